@@ -0,0 +1 @@
+"""pytest runs from the repository root, so `y` imports from here"""
@@ -0,0 +1,134 @@
+""" downloads against a fake downloader """
+
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from y import cli
+from y.download import download
+
+FAKE = os.path.join(os.path.dirname(__file__), "fake_downloader")
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    path = tmp_path / "downloader.log"
+    path.touch()
+    monkeypatch.setenv("FAKE_DOWNLOADER_LOG", str(path))
+    return path
+
+
+def events(log):
+    """(event, host, time, url) of every run of the fake"""
+
+    lines = [line.split(" ", 3) for line in log.read_text().splitlines()]
+    return [(event, host, float(t), url) for event, host, t, url in lines]
+
+
+def most_at_once(events, key=lambda host: True):
+    """the most runs in flight together, of the hosts
+    picked by key"""
+
+    running, most = Counter(), Counter()
+
+    # an end at the same time as a start came before it
+    for event, host, _, _ in sorted(events, key=lambda e: (e[2], e[0] == "start")):
+        if not key(host):
+            continue
+        running[host] += 1 if event == "start" else -1
+        most[host] = max(most[host], running[host])
+        most["*"] = max(most["*"], sum(running.values()) - running["*"])
+
+    return most
+
+
+def test_limits(tmp_path, log):
+    urls = [
+        f"https://{host}/{host[0]}{i}?delay=0.2"
+        for i in range(4)
+        for host in ("a.example", "b.example", "c.example")
+    ]
+
+    results = download(urls, str(tmp_path / "o"), downloader=FAKE, workers=3, per_host=2)
+
+    assert [result["status"] for result in results] == ["downloaded"] * len(urls)
+
+    most = most_at_once(events(log))
+    assert most["*"] == 3
+    assert max(most[host] for host in ("a.example", "b.example", "c.example")) <= 2
+
+
+def test_per_host(tmp_path, log):
+    urls = [f"https://www.youtube.com/watch?v=v{i}&delay=0.1" for i in range(6)]
+
+    download(urls, str(tmp_path / "o"), downloader=FAKE, workers=4, per_host=2)
+
+    assert most_at_once(events(log))["www.youtube.com"] == 2
+
+
+def test_skip_existing(tmp_path, log):
+    objects = tmp_path / "o"
+    (objects / "yt").mkdir(parents=True)
+    (objects / "yt" / "old.mp4").write_text("")
+    (objects / "yt" / "part.mp4.part").write_text("")
+
+    urls = ["https://youtu.be/old", "https://youtu.be/part"]
+    results = download(urls, str(objects), downloader=FAKE)
+
+    assert [result["status"] for result in results] == ["skipped", "downloaded"]
+    assert results[0]["path"] == str(objects / "yt" / "old.mp4")
+    assert [url for _, _, _, url in events(log)] == [urls[1]] * 2
+
+
+def test_retry(tmp_path, log):
+    urls = ["https://a.example/flaky?fail=2", "https://a.example/broken?fail=9"]
+    results = download(urls, str(tmp_path / "o"), downloader=FAKE, retries=2, backoff=0)
+
+    assert [result["status"] for result in results] == ["downloaded", "failed"]
+    assert [result["attempts"] for result in results] == [3, 3]
+    assert results[1]["error"] == "ERROR: [fake] broken: attempt 3 failed"
+    assert results[1]["returncode"] == 1
+
+
+def test_missing_downloader(tmp_path):
+    results = download(
+        ["https://a.example/x"], str(tmp_path), downloader=str(tmp_path / "nope")
+    )
+
+    assert results[0]["status"] == "failed"
+    assert results[0]["attempts"] == 1
+
+
+def test_manifest_order(tmp_path, log):
+    # the first urls finish last
+    urls = [f"https://h{i}.example/v{i}?delay={0.05 * (4 - i)}" for i in range(5)]
+    urls.append(urls[0])
+    manifest = tmp_path / "m" / "downloads.json"
+
+    results = download(urls, str(tmp_path / "o"), str(manifest), FAKE, workers=5)
+
+    finished = [url for event, _, _, url in events(log) if event == "end"]
+    assert finished[0] == urls[4]
+
+    assert json.loads(manifest.read_text()) == results
+    assert [result["url"] for result in results] == urls[:5]
+
+
+@pytest.mark.parametrize(
+    "urls, code",
+    [
+        (["https://a.example/ok"], 0),
+        (["https://a.example/ok", "https://b.example/bad?fail=9"], 1),
+    ],
+)
+def test_exit_code(tmp_path, log, monkeypatch, capsys, urls, code):
+    monkeypatch.setattr(cli, "OBJECTS_DIR", str(tmp_path / "o"))
+    args = cli.command_parser("download").parse_args(
+        ["--downloader", FAKE, "--retries", "1", "--backoff", "0", *urls]
+    )
+
+    assert cli.do_download(args) == code
+    assert (tmp_path / "o" / "downloads.json").exists()
+    assert capsys.readouterr().out.count("\n") == len(urls)
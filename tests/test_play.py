@@ -0,0 +1,77 @@
+""" the counts engine against the shuffle engine """
+
+from collections import Counter
+from math import sqrt
+from typing import Tuple
+
+import pytest
+
+from y.chinese import ChineseHouse
+
+GAMES = 10000
+SEED = 2024
+
+
+def features(engine: str) -> dict:
+    """tallies of what a play decides, over seeded games"""
+
+    tallies = {
+        "lengths": Counter(),
+        "products": Counter(),
+        "major_real": Counter(),
+        "major_imag": Counter(),
+        "intent": Counter(),
+    }
+
+    for rooms in ChineseHouse.play_many(GAMES, seed=SEED, engine=engine):
+        house = ChineseHouse(rooms)
+
+        for i, room in enumerate(rooms[1:4]):
+            tallies["lengths"][i, len(room)] += 1
+            tallies["products"][i, room.exponent] += 1
+
+        tallies["major_real"][house.major.real] += 1
+        tallies["major_imag"][house.major.imag] += 1
+        tallies["intent"][rooms[4].exponent] += 1
+
+    return tallies
+
+
+def chi_square(a: Counter, b: Counter) -> Tuple[float, int]:
+    """two sample chi-square over equal sized samples,
+    pooling sparse cells, with its degrees of freedom"""
+
+    statistic = 0.0
+    cells = 0
+    pooled_a = pooled_b = 0
+
+    for key in set(a) | set(b):
+        if a[key] + b[key] < 10:
+            pooled_a += a[key]
+            pooled_b += b[key]
+            continue
+
+        statistic += (a[key] - b[key]) ** 2 / (a[key] + b[key])
+        cells += 1
+
+    if pooled_a + pooled_b:
+        statistic += (pooled_a - pooled_b) ** 2 / (pooled_a + pooled_b)
+        cells += 1
+
+    return statistic, cells - 1
+
+
+@pytest.fixture(scope="module")
+def engines():
+    return features("shuffle"), features("counts")
+
+
+@pytest.mark.parametrize(
+    "feature", ["lengths", "products", "major_real", "major_imag", "intent"]
+)
+def test_counts_matches_shuffle(engines, feature):
+    shuffle, counts = engines
+    statistic, df = chi_square(shuffle[feature], counts[feature])
+
+    # well within 4 sigma of the chi-square mean
+    assert statistic < df + 4 * sqrt(2 * df), (statistic, df)
@@ -0,0 +1,10 @@
+""" the startup imports against their budget """
+
+from y.bench import IMPORT_BUDGET, import_time
+
+
+def test_import_budget():
+    # the best of a few, a busy machine shouldn't fail it
+    seconds = min(import_time() for _ in range(3))
+
+    assert seconds < IMPORT_BUDGET, f"imports take {seconds:.3f}s"
@@ -0,0 +1,46 @@
+""" the state index against the linear scan it replaced """
+
+import pytest
+
+from y import YBit, Y_INDEX, Y_STATES
+
+
+def scan(value):
+    """how YBit used to resolve a token"""
+
+    for check in Y_STATES:
+        if value == check:
+            return check
+
+    return None
+
+
+TOKENS = [
+    token
+    for state in Y_STATES
+    for token in (
+        state.name,
+        state.lines,
+        str(state.lines),
+        state.value,
+        state.pair,
+        *state.dot,
+        *state.dot_alt,
+        *state.extra,
+        *state.unicode,
+    )
+]
+
+
+@pytest.mark.parametrize("token", TOKENS, ids=repr)
+def test_index_matches_scan(token):
+    assert Y_INDEX[token] is scan(token)
+
+
+@pytest.mark.parametrize("token", TOKENS, ids=repr)
+def test_ybit_matches_scan(token):
+    assert YBit(token)._bit is scan(token)
+
+
+def test_index_has_no_extra_tokens():
+    assert set(Y_INDEX) == set(TOKENS)
@@ -1,10 +1,11 @@
 """types
 """
 
-from typing import Any, List
+from typing import Any, List, Tuple
+from array import array
 from types import SimpleNamespace
+import random
 from random import choice
-from functools import reduce
 from collections.abc import Iterable
 
 
@@ -129,13 +130,64 @@ OldYin = Y_BitState(
 Y_STATES = [Yin, Yang, OldYin, OldYang]
 
 
+def _index_states(states: List[Y_BitState]) -> dict:
+    """build the token lookup for a list of states
+
+    every token a state compares equal to (see
+    Y_BitState.__eq__) is a key, so resolving a
+    glyph, digit, name, value or pair is a single
+    dict hit. earlier states win, like the linear
+    scan in YBit did.
+    """
+
+    index = {}
+
+    for state in reversed(states):
+        for token in (
+            state.name,
+            state.lines,
+            str(state.lines),
+            state.value,
+            state.pair,
+            *state.dot,
+            *state.dot_alt,
+            *state.extra,
+            *state.unicode,
+        ):
+            index[token] = state
+
+    return index
+
+
+Y_INDEX = _index_states(Y_STATES)
+
+
+def _lookup(value: Any) -> Y_BitState | None:
+    """resolve any accepted token to its state"""
+
+    try:
+        return Y_INDEX.get(value) if value else None
+    except TypeError:
+        # unhashable, fall back to comparing
+        for check in Y_STATES:
+            if value == check:
+                return check
+
+    return None
+
+
+# packed codes are the power of i for each state,
+# so Yang=0, OldYang=1, Yin=2, OldYin=3
+Y_CODES = {Yang: 0, OldYang: 1, Yin: 2, OldYin: 3}
+Y_CODE_STATES = (Yang, OldYang, Yin, OldYin)
+
+
 class YBit:
     """complex YBit with superpositions"""
 
     @staticmethod
-    def random():
-        # TODO allow passing a generator
-        return YBit(choice(Y_STATES))
+    def random(rng: Any = None) -> "YBit":
+        return YBit((rng or random).choice(Y_STATES))
 
     def __init__(self, value: Any = None):
         self._bit = None
@@ -145,10 +197,7 @@ class YBit:
         elif isinstance(value, Y_BitState):
             self._bit = value
         else:
-            for check in Y_STATES:
-                if value == check:
-                    self._bit = check
-                    break
+            self._bit = _lookup(value)
 
         if not self._bit:
             raise YStateException(f"Invalid state value {value}")
@@ -179,18 +228,48 @@ class YBit:
         return str(self._bit)
 
     def __mul__(self, other: "YBit") -> "YBit":
-        return YBit(self._bit.value * other._bit.value)
+        # the states are the powers of i, so multiplying
+        # is adding codes mod 4
+        return Y_BITS[(Y_CODES[self._bit] + Y_CODES[other._bit]) & 3]
 
     def __add__(self, other: Any) -> "YSequence":
         return YSequence(self) + YSequence(other)
 
 
+# one shared YBit per state, handed out by sequences
+Y_BITS = tuple(YBit(state) for state in Y_CODE_STATES)
+
+# the code of each (real, imag) bit pair
+_PAIR_CODES = bytes(Y_CODES[Y_INDEX[pair]] for pair in ((0, 0), (0, 1), (1, 0), (1, 1)))
+
+# translate codes to the ascii digits of their real and imag bits
+_REAL_DIGITS = bytes(b"01"[bit.real] for bit in Y_BITS).ljust(256, b"0")
+_IMAG_DIGITS = bytes(b"01"[bit.imag] for bit in Y_BITS).ljust(256, b"0")
+
+
+def _code(value: Any) -> int | None:
+    """the packed code of a bead, None for junk"""
+
+    if isinstance(value, YBit):
+        return Y_CODES[value._bit]
+
+    if isinstance(value, Y_BitState):
+        return Y_CODES.get(value)
+
+    state = _lookup(value)
+    return None if state is None else Y_CODES[state]
+
+
 class YSequence:
     """Y sequence
 
     a sequence is one or more YBits arranged in
     distinct order but that has a commutative
     product value.
+
+    beads are packed one code per byte (see
+    Y_CODES), YBits are only handed out when
+    the sequence is read
     """
 
     MAX_REPR = 20  # the maximum number of elements in __repr__
@@ -201,72 +280,143 @@ class YSequence:
         while called "from_int" it actually takes
         a complex value (which in python is a float)"""
 
+        real, imag = int(n.real), int(n.imag)
+        bits = bitlength or max(real.bit_length(), imag.bit_length())
+
+        return YSequence._from_codes(
+            bytes(
+                _PAIR_CODES[(real >> bit & 1) << 1 | imag >> bit & 1]
+                for bit in range(bits)
+            )
+        )
+
+    @staticmethod
+    def from_ints(
+        values: Iterable[int | float], bitlength: int = None
+    ) -> List["YSequence"]:
+        """convert many complex integers at once, e.g.
+        all 4096 majors. equal values share the same
+        (immutable) sequence"""
+
+        made = {}
         result = []
-        bits = bitlength or max(int(n.real).bit_length(), int(n.imag).bit_length())
 
-        for bit in range(bits):
-            print(bit, int(n.real) >> bit & 1, int(n.imag) >> bit & 1)
-            result.append(YBit((int(n.real) >> bit & 1, int(n.imag) >> bit & 1)))
+        for n in values:
+            sequence = made.get(n)
+            if sequence is None:
+                sequence = made[n] = YSequence.from_int(n, bitlength)
+            result.append(sequence)
+
+        return result
+
+    @staticmethod
+    def to_ints(sequences: Iterable["YSequence"]) -> Tuple[array, array]:
+        """the real and imag integers of many sequences
+        at once, e.g. every major of a play log, as
+        two parallel arrays
+
+        sequences must be shorter than 64 beads"""
+
+        reals, imags = array("Q"), array("Q")
+
+        for sequence in sequences:
+            codes = sequence._codes
+            reals.append(int(codes.translate(_REAL_DIGITS)[::-1], 2))
+            imags.append(int(codes.translate(_IMAG_DIGITS)[::-1], 2))
+
+        return reals, imags
+
+    @staticmethod
+    def _from_codes(codes: bytes) -> "YSequence":
+        """wrap already packed codes without parsing"""
 
-        return YSequence(result)
+        if not codes:
+            raise YSequenceException(f"No YBits from {codes}")
+
+        sequence = YSequence.__new__(YSequence)
+        sequence._codes = bytes(codes)
+        sequence._exponent = None
+        return sequence
 
     def __init__(self, sequence: Any):
-        self._sequence = []
+        self._exponent = None
+
+        if isinstance(sequence, YSequence):
+            self._codes = sequence._codes
+            self._exponent = sequence._exponent
+            return
+
+        codes = bytearray()
 
         if isinstance(sequence, Iterable):
             for y in sequence:
-                try:
-                    self._sequence.append(YBit(y))
-                except YStateException:
-                    # ignore junk in sequences
-                    pass
+                code = _code(y)
+                # ignore junk in sequences
+                if code is not None:
+                    codes.append(code)
 
         else:
-            try:
-                self._sequence.append(YBit(sequence))
-            except YStateException:
-                pass
+            code = _code(sequence)
+            if code is not None:
+                codes.append(code)
 
-        if not self._sequence:
+        if not codes:
             raise YSequenceException(f"No YBits from {sequence}")
 
+        self._codes = bytes(codes)
+
+    @property
+    def codes(self) -> bytes:
+        """the packed bead codes"""
+        return self._codes
+
     @property
     def sequence(self) -> List[YBit]:
-        return self._sequence
+        return list(self)
+
+    @property
+    def exponent(self) -> int:
+        """the power of i of the product, cached
+        since sequences never change"""
+
+        if self._exponent is None:
+            self._exponent = sum(self._codes) & 3
+        return self._exponent
 
     @property
     def product(self) -> YBit:
-        return reduce(lambda x, y: x * y, self.sequence)
+        return Y_BITS[self.exponent]
 
     @property
     def real(self) -> int:
-        result = 0
-        for n, b in enumerate((y.real for y in self)):
-            result += 2**n * b
-        return result
+        # the first bead is the lowest bit
+        return int(self._codes.translate(_REAL_DIGITS)[::-1], 2)
 
     @property
     def imag(self) -> int:
-        result = 0
-        for n, b in enumerate((y.imag for y in self)):
-            result += 2**n * b
-        return result
+        return int(self._codes.translate(_IMAG_DIGITS)[::-1], 2)
 
     @property
     def len(self) -> int:
-        return len(self.sequence)
+        return len(self._codes)
 
     def __len__(self) -> int:
-        return len(self.sequence)
+        return len(self._codes)
 
     def __iter__(self) -> YBit:
-        yield from self.sequence
+        for c in self._codes:
+            yield Y_BITS[c]
 
     def __add__(self, other: Any) -> "YSequence":
-        return YSequence(self.sequence + YSequence(other).sequence)
+        if not isinstance(other, YSequence):
+            other = YSequence(other)
+        result = YSequence._from_codes(self._codes + other._codes)
+        if self._exponent is not None and other._exponent is not None:
+            result._exponent = (self._exponent + other._exponent) & 3
+        return result
 
     def __str__(self) -> str:
-        return "".join(str(y) for y in self._sequence)
+        return "".join(str(Y_BITS[c]) for c in self._codes)
 
     def __repr__(self) -> str:
         seq_str = str(self)
@@ -276,9 +426,9 @@ class YSequence:
 
     def __getitem__(self, key):
         if isinstance(key, slice):
-            return YSequence(self._sequence[key.start : key.stop : key.step])
+            return YSequence._from_codes(self._codes[key])
         else:
-            return self._sequence[key]
+            return Y_BITS[self._codes[key]]
 
 
 class YHouse:
@@ -302,7 +452,7 @@ class YHouse:
 
     @property
     def product(self) -> YBit:
-        return reduce(lambda x, y: x.product * y.product, self.rooms)
+        return Y_BITS[sum(room.exponent for room in self.rooms) & 3]
 
     @property
     def composition(self) -> str:
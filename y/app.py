@@ -0,0 +1,65 @@
+""" app
+
+the interactive cmd2 shell of `python -m y`, each
+command runs the one in cli
+"""
+
+from cmd2 import Cmd, Cmd2ArgumentParser, with_argparser
+
+from . import cli
+
+
+def _parser(name: str) -> Cmd2ArgumentParser:
+    return cli.command_parser(name, Cmd2ArgumentParser)
+
+
+class yApp(Cmd):
+    """command line utilities for y processing"""
+
+    def __init__(self):
+        super().__init__()
+        self.prompt = ":> "
+
+    @with_argparser(_parser("fmt"))
+    def do_fmt(self, args):
+        return cli.do_fmt(args)
+
+    @with_argparser(_parser("archive"))
+    def do_archive(self, args):
+        return cli.do_archive(args)
+
+    @with_argparser(_parser("query"))
+    def do_query(self, args):
+        return cli.do_query(args)
+
+    @with_argparser(_parser("translate"))
+    def do_translate(self, args):
+        return cli.do_translate(args)
+
+    @with_argparser(_parser("serve"))
+    def do_serve(self, args):
+        return cli.do_serve(args)
+
+    @with_argparser(_parser("bench"))
+    def do_bench(self, args):
+        return cli.do_bench(args)
+
+    @with_argparser(_parser("play"))
+    def do_play(self, args):
+        return cli.do_play(args)
+
+    @with_argparser(_parser("commit"))
+    def do_commit(self, args):
+        return cli.do_commit(args)
+
+    @with_argparser(_parser("capture"))
+    def do_capture(self, args):
+        return cli.do_capture(args)
+
+    @with_argparser(_parser("draw"))
+    def do_draw(self, args):
+        return cli.do_draw(args)
+
+    @with_argparser(_parser("download"))
+    def do_download(self, args):
+        return cli.do_download(args)
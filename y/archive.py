@@ -0,0 +1,252 @@
+""" archive
+
+a compact, append-only binary format for houses
+
+a file is a small header followed by fixed size
+records. each record packs the rooms of a house
+(see ChineseHouse.pack) with its room products
+and major, so archives can be queried without
+parsing any dot-notation.
+
+readers mmap the file, a record or a whole column
+is a memoryview straight into the map.
+"""
+
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Tuple
+
+from . import YException
+from .cache import parse_room
+from .chinese import ChineseHouse
+from .metrics import count, timed
+from .rng import KINDS
+
+MAGIC = b"YARC"
+VERSION = 2
+
+# magic, version, record size
+HEADER = struct.Struct("<4sHH8x")
+
+# record size by version, version 2 added seeds and
+# the generator they seed
+RECORD_SIZES = {1: 40, 2: 48}
+RECORD_SIZE = RECORD_SIZES[VERSION]
+
+# the seed replaying a house (see ChineseHouse.from_seed),
+# only meaningful when the seeded column is set
+SEED = struct.Struct("<Q")
+SEED_OFFSET = 40
+
+# the generator a seed is for, as its index in rng.KINDS
+KIND_OFFSET = 39
+
+# single byte columns, by offset into a record
+COLUMNS = {
+    "length1": 0,
+    "length2": 1,
+    "length3": 2,
+    "start": 3,
+    "product1": 32,
+    "product2": 33,
+    "product3": 34,
+    "intent": 35,
+    "real": 36,
+    "imag": 37,
+    "seeded": 38,
+    "kind": 39,
+}
+
+
+class ArchiveException(YException):
+    """exception for archives"""
+
+
+def pack(house: ChineseHouse, version: int = VERSION) -> bytes:
+    """the archive record of a house"""
+
+    major = house.major
+
+    record = (
+        ChineseHouse.pack(house.rooms)
+        + bytes(room.exponent for room in house.rooms[1:])
+        + bytes((major.real, major.imag, house.seed is not None))
+    )
+
+    if version > 1:
+        kind = KINDS.index(house.kind) if house.seed is not None else 0
+        record += bytes((kind,)) + SEED.pack(house.seed or 0)
+
+    return record.ljust(RECORD_SIZES[version], b"\0")
+
+
+class Archive:
+    """an archive file of houses
+
+    with create, opening a path that doesn't exist
+    makes an empty archive, readers get an error
+    """
+
+    def __init__(self, path: str | Path, create: bool = False):
+        self.path = Path(path)
+
+        if not self.path.exists() or not self.path.stat().st_size:
+            if not create:
+                raise ArchiveException(f"no archive at {self.path}")
+
+            with open(self.path, "wb") as archive:
+                archive.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE))
+
+        self._file = open(self.path, "rb")
+        self._map()
+
+    def _map(self):
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        # a file too short for a header reads as a bad one
+        header = self._mmap[: HEADER.size].ljust(HEADER.size, b"\0")
+        magic, version, size = HEADER.unpack(header)
+
+        if magic != MAGIC or RECORD_SIZES.get(version) != size:
+            self._mmap.close()
+            self._file.close()
+            raise ArchiveException(f"{self.path} is not an archive")
+
+        self.version = version
+        self.record_size = size
+
+        self._view = memoryview(self._mmap)
+        # a torn write at the end is not a record
+        self._len = (len(self._mmap) - HEADER.size) // size
+
+    def __enter__(self) -> "Archive":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def fingerprint(self) -> Tuple[int, int, int]:
+        """the size, mtime and inode of the open file,
+        which change whenever it's written or replaced"""
+
+        stat = os.fstat(self._file.fileno())
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    def record(self, i: int) -> memoryview:
+        """the raw record of the ith house"""
+
+        if not -self._len <= i < self._len:
+            raise IndexError(i)
+
+        offset = HEADER.size + i % self._len * self.record_size
+        return self._view[offset : offset + self.record_size]
+
+    def column(self, name: str) -> memoryview:
+        """a column across every record, e.g. "real" """
+
+        if name not in COLUMNS:
+            raise ArchiveException(f"no column {name}")
+
+        start = HEADER.size + COLUMNS[name]
+        end = HEADER.size + self._len * self.record_size
+        return self._view[start : end : self.record_size]
+
+    def seed(self, i: int) -> int | None:
+        """the seed of the ith house, if it was recorded"""
+
+        record = self.record(i)
+        if self.version < 2 or not record[COLUMNS["seeded"]]:
+            return None
+
+        return SEED.unpack_from(record, SEED_OFFSET)[0]
+
+    def kind(self, i: int) -> str | None:
+        """the generator the seed of the ith house is
+        for, if the seed was recorded"""
+
+        record = self.record(i)
+        if self.version < 2 or not record[COLUMNS["seeded"]]:
+            return None
+
+        kind = record[KIND_OFFSET]
+        if kind >= len(KINDS):
+            raise ArchiveException(f"unknown generator {kind} in record {i}")
+
+        return KINDS[kind]
+
+    def replay(self, i: int) -> ChineseHouse:
+        """the ith house played again from its seed"""
+
+        seed = self.seed(i)
+        if seed is None:
+            raise ArchiveException(f"record {i} has no seed")
+
+        return ChineseHouse.from_seed(seed, self.kind(i))
+
+    def __getitem__(self, i: int) -> ChineseHouse:
+        record = self.record(i)
+        rooms = bytes(record[: ChineseHouse.RECORD_SIZE])
+        return ChineseHouse(
+            ChineseHouse.unpack(rooms), self.seed(i), self.kind(i) or "mt"
+        )
+
+    def __iter__(self) -> Iterator[ChineseHouse]:
+        for i in range(self._len):
+            yield self[i]
+
+    def append(self, houses: Iterable[ChineseHouse]) -> int:
+        """append houses, returns how many were written"""
+        return self.write(b"".join(pack(house, self.version) for house in houses))
+
+    @timed("archive.write")
+    def write(self, records: bytes) -> int:
+        """append packed records"""
+
+        count("archive.records", len(records) // self.record_size)
+
+        with open(self.path, "ab") as archive:
+            archive.write(records)
+
+        # the old map stays valid for any views still held
+        self._map()
+        return len(records) // self.record_size
+
+
+def from_text(
+    lines: Iterable[str], archive: Archive, batch: int = 10000
+) -> List[str]:
+    """append dot-notation lines (as in play.log) to
+    an archive, returns the lines that couldn't be read"""
+
+    records = bytearray()
+    skipped = []
+
+    for line in lines:
+        try:
+            house = ChineseHouse([parse_room(r) for r in line[:51].split()])
+            records += pack(house, archive.version)
+        except (YException, IndexError, ValueError):
+            skipped.append(line.rstrip())
+
+        if len(records) >= batch * archive.record_size:
+            archive.write(records)
+            records.clear()
+
+    archive.write(records)
+    return skipped
+
+
+def to_text(archive: Archive, out: IO):
+    """write an archive back out as dot-notation"""
+
+    for house in archive:
+        out.write(house.composition + "\n")
@@ -0,0 +1,334 @@
+""" bench
+
+benchmarks of the hot paths, `python -m y bench`
+
+micro benchmarks time single operations (bead
+comparison, parsing, play, composition, wen
+numbers ...), macro benchmarks run fmt over a
+synthetic play log and a million games, and the
+startup benchmark times the imports of the
+command line.
+
+results are written as json so two commits can be
+compared, a comparison fails when anything got
+slower than the threshold. the startup imports
+also have a fixed budget of their own.
+"""
+
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import Callable, Dict, IO, List, Tuple
+
+from . import Yang, YSequence
+from .cache import ROOMS
+from .chinese import ChineseHouse, Hexagram, Translate
+from .fmt import fmt
+
+THRESHOLD = 10.0  # percent slower that counts as a regression
+IMPORT_BUDGET = 0.075  # seconds to import what `python -m y play` needs
+SEED = 1749
+
+# a benchmark returns a function to time and how many
+# operations one call of it does
+Benchmark = Tuple[Callable[[], object], int]
+
+
+def _houses(n: int) -> List[List[YSequence]]:
+    rng = random.Random(SEED)
+    return [ChineseHouse.play_counts(rng) for _ in range(n)]
+
+
+def bench_state_eq(scale: float) -> Benchmark:
+    # the tokens readings are actually written in, and some that miss
+    tokens = ["ⵔ", "●", "ⴲ", "ⵀ", "ⴱ", "○", "yang", 7, (1, 1), "x", 1j]
+
+    def run():
+        for token in tokens:
+            Yang == token
+
+    return run, len(tokens)
+
+
+def bench_sequence_init(scale: float) -> Benchmark:
+    rooms = [str(room) for rooms in _houses(20) for room in rooms]
+
+    def run():
+        for room in rooms:
+            YSequence(room)
+
+    return run, len(rooms)
+
+
+def bench_play(scale: float) -> Benchmark:
+    rng = random.Random(SEED)
+    return lambda: ChineseHouse.play(rng), 1
+
+
+def bench_play_counts(scale: float) -> Benchmark:
+    rng = random.Random(SEED)
+    return lambda: ChineseHouse.play_counts(rng), 1
+
+
+def bench_composition(scale: float) -> Benchmark:
+    houses = _houses(100)
+
+    def run():
+        # houses cache what they work out, so build fresh ones
+        for rooms in houses:
+            ChineseHouse(rooms).composition
+
+    return run, len(houses)
+
+
+def bench_major(scale: float) -> Benchmark:
+    houses = _houses(100)
+
+    def run():
+        for rooms in houses:
+            ChineseHouse(rooms).major
+
+    return run, len(houses)
+
+
+def bench_wen(scale: float) -> Benchmark:
+    hexagrams = [Hexagram(value) for value in range(64)]
+
+    def run():
+        for hexagram in hexagrams:
+            hexagram.wen
+
+    return run, len(hexagrams)
+
+
+def bench_translate(scale: float) -> Benchmark:
+    translate = Translate()
+    codes = list(translate.table("y"))
+
+    def run():
+        for _ in translate.translate_many(codes, "w"):
+            pass
+
+    return run, len(codes)
+
+
+def bench_fmt(scale: float) -> Benchmark:
+    # several MB of log, every reading different
+    lines = [
+        ChineseHouse(rooms).composition + " a note\n"
+        for rooms in _houses(int(40000 * scale))
+    ]
+
+    def run():
+        ROOMS.clear()
+        fmt(lines, io.StringIO(), io.StringIO())
+
+    return run, len(lines)
+
+
+def bench_games(scale: float) -> Benchmark:
+    n = int(1_000_000 * scale)
+    return lambda: ChineseHouse.play_many(n, seed=SEED, workers=1), n
+
+
+def import_time() -> float:
+    """seconds a fresh interpreter spends importing
+    what `python -m y play` needs"""
+
+    proc = subprocess.run(
+        (sys.executable, "-X", "importtime", "-c", "import y.cli, y.chinese"),
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(__file__))},
+    )
+
+    # import time: self [us] | cumulative | imported package
+    total = 0
+    for line in proc.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.startswith(" y") and name[1:].split(".")[0] == "y":
+            total += int(cumulative)
+
+    return total / 1e6
+
+
+def bench_import(scale: float) -> Benchmark:
+    return import_time, 1
+
+
+# name: (kind, benchmark)
+BENCHMARKS: Dict[str, Tuple[str, Callable[[float], Benchmark]]] = {
+    "state.eq": ("micro", bench_state_eq),
+    "sequence.init": ("micro", bench_sequence_init),
+    "house.play": ("micro", bench_play),
+    "house.play_counts": ("micro", bench_play_counts),
+    "house.composition": ("micro", bench_composition),
+    "house.major": ("micro", bench_major),
+    "hexagram.wen": ("micro", bench_wen),
+    "translate.many": ("micro", bench_translate),
+    "fmt.log": ("macro", bench_fmt),
+    "play.million": ("macro", bench_games),
+    "import": ("startup", bench_import),
+}
+
+
+def measure(name: str, scale: float = 1.0, repeat: int = 5) -> dict:
+    """the best time per operation of a benchmark"""
+
+    kind, benchmark = BENCHMARKS[name]
+    run, ops = benchmark(scale)
+
+    if kind == "startup":
+        # what the interpreter reports, not the subprocess
+        times = [run() for _ in range(repeat)]
+        number = 1
+    elif kind == "macro":
+        times = timeit.repeat(run, number=1, repeat=max(repeat // 2, 1))
+        number = 1
+    else:
+        number, _ = timeit.Timer(run).autorange()
+        times = timeit.repeat(run, number=number, repeat=repeat)
+
+    return {
+        "kind": kind,
+        "seconds": min(times) / (number * ops),
+        "ops": ops,
+        "number": number,
+        "repeat": len(times),
+    }
+
+
+def run_benchmarks(
+    names: List[str], scale: float = 1.0, repeat: int = 5, out: IO = None
+) -> dict:
+    """run benchmarks, reporting each as it finishes"""
+
+    results = {}
+
+    for name in names:
+        results[name] = measure(name, scale, repeat)
+        if out:
+            print(f"{name:20} {_human(results[name]['seconds']):>10}/op", file=out)
+
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float = THRESHOLD, out: IO = sys.stdout
+) -> List[str]:
+    """the benchmarks more than threshold percent
+    slower than the baseline"""
+
+    regressions = []
+
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+
+        change = (result["seconds"] / before["seconds"] - 1) * 100
+        slower = change > threshold
+        if slower:
+            regressions.append(name)
+
+        print(
+            f"{name:20} {_human(before['seconds']):>10} -> "
+            f"{_human(result['seconds']):>10} {change:+7.1f}%"
+            f"{'  REGRESSION' if slower else ''}",
+            file=out,
+        )
+
+    return regressions
+
+
+def _human(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g}{unit}"
+
+    return f"{seconds / 1e-9:.3g}ns"
+
+
+def _commit() -> str | None:
+    try:
+        proc = subprocess.run(
+            ("git", "rev-parse", "--short", "HEAD"),
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(__file__),
+        )
+    except OSError:
+        return None
+
+    return proc.stdout.strip() or None
+
+
+def bench(
+    patterns: List[str] = None,
+    output: str = None,
+    baseline: str = None,
+    threshold: float = THRESHOLD,
+    scale: float = 1.0,
+    repeat: int = 5,
+    import_budget: float = IMPORT_BUDGET,
+) -> int:
+    """run the benchmarks matching any of patterns,
+    fail on regressions against a baseline or an
+    import over budget"""
+
+    names = [
+        name
+        for name in BENCHMARKS
+        if not patterns or any(pattern in name for pattern in patterns)
+    ]
+
+    results = run_benchmarks(names, scale, repeat, sys.stderr)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    failed = False
+
+    if baseline:
+        with open(baseline) as f:
+            regressions = compare(json.load(f), results, threshold, sys.stderr)
+
+        if regressions:
+            print(
+                f"REGRESSION: {', '.join(regressions)} slower by more than "
+                f"{threshold:g}%",
+                file=sys.stderr,
+            )
+            failed = True
+
+    if "import" in results["results"]:
+        seconds = results["results"]["import"]["seconds"]
+        if seconds > import_budget:
+            print(
+                f"REGRESSION: imports take {_human(seconds)}, "
+                f"over the {_human(import_budget)} budget",
+                file=sys.stderr,
+            )
+            failed = True
+
+    return int(failed)
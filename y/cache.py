@@ -0,0 +1,224 @@
+""" cache
+
+the same readings turn up again and again in the
+logs and in vim, so parsed rooms are kept in a
+bounded LRU keyed by their dot-notation
+
+an optional sqlite tier under CACHE_DIR keeps them
+between runs, shared by the CLI and the vim plugin.
+turn it on with Y_ROOM_CACHE=disk. it is in WAL mode
+and new rooms are written in short batches, so any
+number of processes can use it at once, and each
+process opens its own connection. if the database
+can't be used the cache carries on in memory only.
+"""
+
+import atexit
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from . import YSequence
+from .metrics import timed
+
+CACHE_DIR = Path(os.environ.get("Y_CACHE_DIR", Path.home() / ".cache" / "y"))
+
+
+class RoomCache:
+    """bounded LRU of room strings to parsed sequences
+
+    sequences are immutable and their product is
+    computed before they're cached, so a hit costs
+    nothing more than the lookup. threads can share
+    it, an eviction racing a hit just drops the entry
+    """
+
+    TIMEOUT = 5  # seconds to wait for another writer
+    BATCH = 1024  # new rooms held back before they're written
+
+    def __init__(self, maxsize: int = 65536, path: str | Path = None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._rooms = OrderedDict()
+        self._path = path
+        self._db = None
+        self._pid = None
+        self._pending = []
+        self._writing = threading.Lock()
+
+        if path:
+            atexit.register(self.close)
+
+    def __call__(self, room: str) -> YSequence:
+        sequence = self._rooms.get(room)
+
+        if sequence is not None:
+            self.hits += 1
+            try:
+                self._rooms.move_to_end(room)
+            except KeyError:
+                # evicted by another thread since the get
+                pass
+            return sequence
+
+        sequence = self._load(room)
+
+        if sequence is None:
+            self.misses += 1
+            sequence = YSequence(room)
+            self._save(room, sequence)
+
+        # work out the product now, so hits never have to
+        sequence.exponent
+        self._rooms[room] = sequence
+
+        if len(self._rooms) > self.maxsize:
+            try:
+                self._rooms.popitem(last=False)
+                self.evictions += 1
+            except KeyError:
+                pass
+
+        return sequence
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "size": len(self._rooms),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """this process's connection to the disk tier,
+        never one inherited across a fork"""
+
+        if not self._path:
+            return None
+
+        if self._db is not None and self._pid == os.getpid():
+            return self._db
+
+        # rooms a parent held back are the parent's to write
+        self._pending = []
+
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+
+        # autocommit, each batch is its own short transaction
+        db = sqlite3.connect(
+            self._path,
+            timeout=self.TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            # under WAL this only risks the last batches on power loss
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS rooms (room TEXT PRIMARY KEY, codes BLOB)"
+            )
+        except sqlite3.Error:
+            db.close()
+            raise
+
+        self._db = db
+        self._pid = os.getpid()
+        return db
+
+    def _disable(self):
+        """carry on in memory only"""
+
+        if self._db is not None and self._pid == os.getpid():
+            self._db.close()
+
+        self._path = None
+        self._db = None
+        self._pending = []
+
+    def _load(self, room: str) -> YSequence | None:
+        try:
+            db = self._connect()
+            if not db:
+                return None
+
+            row = db.execute(
+                "SELECT codes FROM rooms WHERE room = ?", (room,)
+            ).fetchone()
+        except (sqlite3.Error, OSError):
+            self._disable()
+            return None
+
+        if not row:
+            return None
+
+        self.disk_hits += 1
+        return YSequence._from_codes(row[0])
+
+    def _save(self, room: str, sequence: YSequence):
+        if not self._path:
+            return
+
+        self._pending.append((room, sequence.codes))
+
+        if len(self._pending) >= self.BATCH:
+            self.flush()
+
+    def flush(self):
+        """write the rooms held back to the disk tier"""
+
+        if not self._pending:
+            return
+
+        try:
+            with self._writing:
+                db = self._connect()
+                if db:
+                    pending, self._pending = self._pending, []
+
+                    # one transaction for the lot
+                    db.execute("BEGIN IMMEDIATE")
+                    db.executemany(
+                        "INSERT OR IGNORE INTO rooms VALUES (?, ?)", pending
+                    )
+                    db.execute("COMMIT")
+        except (sqlite3.Error, OSError):
+            # closing the connection rolls back what's half done
+            self._disable()
+
+    def clear(self):
+        self._rooms.clear()
+
+    def close(self):
+        # a connection from before a fork is the parent's to close
+        if self._db is not None and self._pid == os.getpid():
+            self.flush()
+            self._db.close()
+
+        self._db = None
+
+
+ROOMS = RoomCache(
+    path=(CACHE_DIR / "rooms.sqlite3")
+    if os.environ.get("Y_ROOM_CACHE") == "disk"
+    else None
+)
+
+
+@timed("parse.room")
+def parse_room(room: str) -> YSequence:
+    """parse a room through the shared cache"""
+    return ROOMS(room)
@@ -5,11 +5,43 @@ by Magister Ludi Knecht who based them heavily
 on the I Ching.
 """
 
-from typing import Any, Tuple, List
-from random import shuffle, uniform
+import random
+from functools import cached_property
+from typing import Any, Callable, Iterable, Iterator, List, Tuple
 
 
-from . import YSequence, YHouse, Yin, Yang, OldYin, OldYang
+from . import (
+    YException,
+    YBit,
+    YSequence,
+    YHouse,
+    Y_CODES,
+    Y_INDEX,
+    Yin,
+    Yang,
+    OldYin,
+    OldYang,
+)
+from .metrics import timed
+
+
+def _permutations(base: str, sequences: dict) -> Tuple[dict, dict]:
+    """precompute the permutation tables of named
+    orderings of the glyphs in base (which is
+    ordered by value)
+
+    returns value -> position and position -> value
+    tables for each ordering, positions count from 1
+    """
+
+    positions = {}
+    values = {}
+
+    for name, sequence in sequences.items():
+        positions[name] = tuple(sequence.index(glyph) + 1 for glyph in base)
+        values[name] = tuple(base.index(glyph) for glyph in sequence)
+
+    return positions, values
 
 
 class Trigram(YSequence):
@@ -27,6 +59,28 @@ class Trigram(YSequence):
         "desig": "☷☳☵☴☰☶☲☱",  # the Designori-Campbell sequence
     }
 
+    _POSITIONS, _VALUES = _permutations(_Y, _SEQUENCE_MAP)
+
+    @classmethod
+    def from_position(cls, order: str, n: int) -> "Trigram":
+        """the nth (from 1) trigram of an ordering"""
+
+        values = cls._VALUES[order]
+        if not 0 < n <= len(values):
+            raise IndexError(
+                f"{order} positions run from 1 to {len(values)}, not {n}"
+            )
+
+        return cls(YSequence.from_int(values[n - 1], 3))
+
+    @property
+    def value(self) -> int:
+        return self.real
+
+    def position(self, order: str) -> int:
+        """position (from 1) within an ordering"""
+        return self._POSITIONS[order][self.value]
+
 
 class Hexagram(YSequence):
     """yijing hexagram"""
@@ -45,67 +99,129 @@ class Hexagram(YSequence):
         "siu": "䷀䷫䷌䷉䷈䷍䷪䷠䷘䷼䷙䷡䷅䷤䷥䷄䷸䷝䷹䷱䷰䷛䷋䷩䷨䷊䷺䷕䷵䷴䷔䷻䷑䷶䷷䷐䷟䷞䷮䷯䷾䷿䷓䷚䷒䷃䷣䷳䷲䷢䷂䷭䷽䷬䷜䷦䷧䷗䷆䷎䷏䷇䷖䷁",
     }
 
+    _POSITIONS, _VALUES = _permutations(_Y, _seq)
+
+    @classmethod
+    def from_position(cls, order: str, n: int) -> "Hexagram":
+        """the nth (from 1) hexagram of an ordering"""
+
+        values = cls._VALUES[order]
+        if not 0 < n <= len(values):
+            raise IndexError(
+                f"{order} positions run from 1 to {len(values)}, not {n}"
+            )
+
+        return cls(values[n - 1])
+
     def __init__(self, value):
         self._value = value
 
     @property
     def wen(self):
-        return self._seq["wen"].index(self._Y[self._value]) + 1
+        return self._POSITIONS["wen"][self._value]
+
+    def position(self, order: str) -> int:
+        """position (from 1) within an ordering"""
+        return self._POSITIONS[order][self._value]
 
     def __str__(self):
         return self._Y[self._value]
 
 
+class HouseException(YException):
+    """exception for houses"""
+
+
 class ChineseHouse(YHouse):
-    def __init__(self, rooms: List[YSequence]):
-        super().__init__(rooms)
+    """chinese house
+
+    houses are immutable once built, so everything
+    derived from the rooms is computed once, when
+    first asked for, and kept on the instance
+    """
+
+    def __init__(self, rooms: List[YSequence], seed: int = None, kind: str = "mt"):
+        rooms = list(rooms)
 
         # special case of all sixes
-        if len(self.rooms) == 4 and len(self.rooms[3]) == 9:
-            last = self._rooms[3]
-            self._rooms[3] = last[:-1]
-            self._rooms.append(last[-1])
+        if len(rooms) == 4 and len(rooms[3]) == 9:
+            last = rooms[3]
+            rooms[3:] = [last[:-1], last[-1:]]
 
-    @property
-    def composition(self):
-        result = str(self.rooms[0])
-        for i, room in enumerate(self.rooms[1:4]):
-            offset = 0
-
-            if room.product == Yang:
-                offset = 1
-            elif room.product == Yin:
-                offset = 2
-            elif room.product == OldYang:
-                offset = 3
-            elif room.product == OldYin:
-                offset = 4
+        object.__setattr__(self, "_rooms", tuple(rooms))
+
+        # the seed that replays this house, when known, and
+        # the kind of generator it seeds (see rng.KINDS)
+        object.__setattr__(self, "seed", seed)
+        object.__setattr__(self, "kind", kind)
+
+    def __setattr__(self, *args):
+        raise TypeError("can't change immutable class")
+
+    __delattr__ = __setattr__
 
+    # composition spacing for each room product, by code
+    _OFFSETS = {
+        Y_CODES[Yang]: 1,
+        Y_CODES[Yin]: 2,
+        Y_CODES[OldYang]: 3,
+        Y_CODES[OldYin]: 4,
+    }
+
+    @cached_property
+    def products(self) -> Tuple[YBit, ...]:
+        """the product of each room"""
+        return tuple(room.product for room in self.rooms)
+
+    @cached_property
+    def product(self) -> YBit:
+        return super().product
+
+    @cached_property
+    def offsets(self) -> Tuple[int, ...]:
+        """where the waves sit in the composition"""
+        return tuple(self._OFFSETS[room.exponent] for room in self.rooms[1:4])
+
+    @cached_property
+    @timed("house.composition")
+    def composition(self) -> str:
+        result = str(self.rooms[0])
+        for i, (offset, room) in enumerate(zip(self.offsets, self.rooms[1:4])):
             result += " " * offset * (i + 1) + str(room)
 
         result += " " * (49 - len(result)) + str(self.rooms[4])
         return result
 
-    @property
-    def major(self):
-        lines = []
+    @cached_property
+    @timed("house.major")
+    def major(self) -> YSequence:
+        lines = bytearray()
 
         for room in self.rooms[1:4]:
-            lines.append(room[0::4] + room[1::4])
-            lines.append(room[2::4] + room[3::4])
+            codes = room.codes
+            lines.append(sum(codes[0::4]) + sum(codes[1::4]) & 3)
+            lines.append(sum(codes[2::4]) + sum(codes[3::4]) & 3)
 
-        return YSequence([l.product for l in lines])
+        return YSequence._from_codes(lines)
+
+    @cached_property
+    def hexagrams(self) -> Tuple["Hexagram", "Hexagram"]:
+        """the real and imag hexagrams of the major"""
+        return Hexagram(self.major.real), Hexagram(self.major.imag)
 
     def line_length(self):
         return 12 - (len(self.rooms[1]) + len(self.rooms[2]) + len(self.rooms[3])) // 4
 
     @staticmethod
-    def play() -> List[YSequence]:
+    @timed("house.play")
+    def play(rng: random.Random = None) -> List[YSequence]:
+        rng = rng or random
+
         # first assemble a pile
         pile = [Yin] * 22 + [Yang] * 16 + [OldYang] * 9 + [OldYin] * 3
 
         # shuffle
-        shuffle(pile)
+        rng.shuffle(pile)
 
         # pull the intent
         intent = pile.pop()
@@ -115,17 +231,17 @@ class ChineseHouse(YHouse):
         rooms = [None, None, None]
 
         for r, _ in enumerate(rooms):
-            shuffle(pile)
+            rng.shuffle(pile)
             score = []
 
             length = len(pile)
-            split = int(uniform(4, length - 4))
+            split = int(rng.uniform(4, length - 4))
 
             left = pile[:split]
             right = pile[split:]
 
-            shuffle(left)
-            shuffle(right)
+            rng.shuffle(left)
+            rng.shuffle(right)
 
             # pop the wave starter
             if not start:
@@ -146,25 +262,382 @@ class ChineseHouse(YHouse):
 
         return [YSequence(start), *[YSequence(r) for r in rooms], YSequence(intent)]
 
+    # packed plays are the three room lengths followed by
+    # the codes of start, rooms and intent, zero padded
+    RECORD_SIZE = 32
+
+    @staticmethod
+    def pack(rooms: List[YSequence]) -> bytes:
+        """pack the rooms of a play into a fixed size record"""
+
+        start, *waves, intent = rooms
+        record = bytes(len(wave) for wave in waves) + b"".join(
+            room.codes for room in rooms
+        )
+
+        if (
+            len(waves) != 3
+            or len(start) != 1
+            or len(intent) != 1
+            or len(record) > ChineseHouse.RECORD_SIZE
+        ):
+            raise HouseException(f"can't pack {rooms}")
+
+        return record.ljust(ChineseHouse.RECORD_SIZE, b"\0")
+
+    @staticmethod
+    def unpack(record: bytes) -> List[YSequence]:
+        """the rooms of a packed play"""
+
+        rooms = []
+        offset = 3
+
+        for length in (1, *record[:3], 1):
+            rooms.append(YSequence._from_codes(record[offset : offset + length]))
+            offset += length
+
+        return rooms
+
+    @staticmethod
+    @timed("house.play_counts")
+    def play_counts(rng: random.Random = None) -> List[YSequence]:
+        """play a game on bead counts rather than a shuffled
+        pile, the rooms come out with the same distribution
+        as play() but nothing is shuffled or copied"""
+
+        return ChineseHouse.unpack(_play_counts(rng or random))
+
+    @staticmethod
+    def from_seed(
+        seed: int = None, kind: str = "mt", play: Callable = None
+    ) -> "ChineseHouse":
+        """the house play (by default play_counts) plays
+        from a seed, so a house can be kept as just its
+        seed and replayed. without a seed a new one is
+        drawn"""
+
+        from .rng import generator
+
+        if seed is None:
+            seed = random.getrandbits(64)
+
+        play = play or ChineseHouse.play_counts
+        return ChineseHouse(play(generator(seed, kind)), seed, kind)
+
+    @staticmethod
+    @timed("house.play_many")
+    def play_many(
+        n: int, seed: int = None, workers: int = None, engine: str = "counts"
+    ) -> "Plays":
+        """play n games, across a process pool when given
+        more than one worker
+
+        games are played in fixed chunks, each with its
+        own generator seeded from the seed and the chunk
+        number, so results are reproducible whatever the
+        number of workers. engine is one of PLAY_ENGINES
+        """
+
+        if seed is None:
+            seed = random.getrandbits(64)
+
+        if engine not in PLAY_ENGINES:
+            raise HouseException(f"unknown play engine {engine}")
+
+        chunks = [
+            (seed, i, min(PLAY_CHUNK, n - start), engine)
+            for i, start in enumerate(range(0, n, PLAY_CHUNK))
+        ]
+
+        if workers and workers > 1:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(workers) as pool:
+                records = pool.map(_play_chunk, *zip(*chunks))
+                return Plays(b"".join(records), seed)
+
+        return Plays(b"".join(_play_chunk(*chunk) for chunk in chunks), seed)
+
+
+PLAY_CHUNK = 4096  # games per generator in play_many
+
+# beads of each code in a fresh pile, as in ChineseHouse.play
+PILE = (16, 9, 22, 3)
+
+
+def _play_counts(rng: random.Random, pile: Tuple[int, ...] = PILE) -> bytes:
+    """play a packed game on the counts of each code in
+    pile (by default the chinese one)
+
+    beads of a code are interchangeable, and every bead
+    that leaves the pile in a wave is a uniform draw from
+    it, whichever side of the split it came from. so
+    instead of shuffling and splitting lists, a wave only
+    needs the split point (for the remainder sizes) and
+    then draws its beads one at a time from the counts
+    """
+
+    counts = list(pile)
+    total = sum(counts)
+    lengths = bytearray()
+    beads = bytearray()
+
+    def draw() -> int:
+        nonlocal total
+        r = int(rng.random() * total)
+        code = 0
+        while r >= counts[code]:
+            r -= counts[code]
+            code += 1
+        counts[code] -= 1
+        total -= 1
+        return code
+
+    intent = draw()
+
+    for wave in range(3):
+        split = int(rng.uniform(4, total - 4))
+
+        # the wave starter comes off the right
+        left_remainder = split % 4 or 4
+        right_remainder = (total - split - 1) % 4 or 4
+        drawn = 1 + left_remainder + right_remainder
+
+        # the first starter is the start of the house
+        lengths.append(drawn - 1 if wave == 0 else drawn)
+
+        for _ in range(drawn):
+            beads.append(draw())
+
+    beads.append(intent)
+
+    return bytes(lengths + beads).ljust(ChineseHouse.RECORD_SIZE, b"\0")
+
+
+PLAY_ENGINES = {
+    "shuffle": lambda rng: ChineseHouse.pack(ChineseHouse.play(rng)),
+    "counts": _play_counts,
+}
+
+
+def _play_chunk(seed: int, index: int, count: int, engine: str) -> bytes:
+    rng = random.Random(f"{seed}:{index}")
+    play = PLAY_ENGINES[engine]
+    return b"".join(play(rng) for _ in range(count))
+
+
+class Plays:
+    """packed results of ChineseHouse.play_many
+
+    each game is a ChineseHouse.RECORD_SIZE record,
+    rooms are only unpacked when a game is read
+    """
+
+    def __init__(self, records: bytes, seed: int = None):
+        self.records = records
+        self.seed = seed
+
+    def __len__(self) -> int:
+        return len(self.records) // ChineseHouse.RECORD_SIZE
+
+    def __getitem__(self, i: int) -> List[YSequence]:
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+
+        size = ChineseHouse.RECORD_SIZE
+        offset = i % len(self) * size
+        return ChineseHouse.unpack(self.records[offset : offset + size])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class TranslateException(YException):
+    """exception for translations"""
+
+
+class Translate:
+    """translates majors between notations
+
+        dot   the six beads, "ⵔ●ⴲⴱ●ⵔ"
+        y     octal real and imag, "y12>34"
+        w     wen numbers of the hexagrams, "w11>42"
+        x     unicode hexagrams, "䷊>䷋"
+        u     unicode trigrams, lower first like the beads, "☰☷>☷☰"
+        pair  (real, imag)
+
+    there are only 4096 majors, so every notation of
+    every major is worked out once into tables shared
+    by all instances, and a translation is two lookups.
+    values can also be readings, houses or sequences.
+    """
+
+    NOTATIONS = ("dot", "y", "w", "x", "u", "pair")
+
+    _TABLES = None  # (notation -> tuple by major, value -> major), built on first use
+
+    @staticmethod
+    def _build() -> Tuple[dict, dict]:
+        # a major is numbered real << 6 | imag
+        pairs = [(real, imag) for real in range(64) for imag in range(64)]
+        hexagrams = Hexagram._Y
+        trigrams = [Trigram._Y[v & 7] + Trigram._Y[v >> 3] for v in range(64)]
+        wen = Hexagram._POSITIONS["wen"]
+
+        # beads print with a random glyph variant, tables use
+        # the first, the parser still reads all the others
+        glyphs = [Y_INDEX[pair].dot[0] for pair in ((0, 0), (0, 1), (1, 0), (1, 1))]
+        bits = [[v >> bit & 1 for bit in range(6)] for v in range(64)]
+        beads = [
+            [
+                "".join(glyphs[r << 1 | i] for r, i in zip(bits[real], bits[imag]))
+                for imag in range(64)
+            ]
+            for real in range(64)
+        ]
+
+        tables = {
+            "dot": tuple(beads[real][imag] for real, imag in pairs),
+            "y": tuple(f"y{real:02o}>{imag:02o}" for real, imag in pairs),
+            "w": tuple(f"w{wen[real]}>{wen[imag]}" for real, imag in pairs),
+            "x": tuple(f"{hexagrams[real]}>{hexagrams[imag]}" for real, imag in pairs),
+            "u": tuple(f"{trigrams[real]}>{trigrams[imag]}" for real, imag in pairs),
+            "pair": tuple(pairs),
+        }
+
+        # the notations never collide, so one index reads them all
+        index = {}
+        for table in tables.values():
+            index.update((value, major) for major, value in enumerate(table))
+
+        return tables, index
+
+    def __init__(self):
+        if Translate._TABLES is None:
+            Translate._TABLES = Translate._build()
+
+        self._tables, self._index = Translate._TABLES
+
+    def major(self, value: Any) -> int:
+        """the number of a major given in any notation"""
+
+        try:
+            major = self._index.get(value)
+        except (TypeError, AttributeError):
+            # unhashable, or a hexagram, which hashes as a sequence
+            major = None
+
+        if major is not None:
+            return major
+
+        if isinstance(value, ChineseHouse):
+            value = value.major
+
+        if isinstance(value, Hexagram):
+            raise TranslateException(
+                f"{value} is one hexagram, a major is a (real, imag) pair"
+            )
+
+        if isinstance(value, YSequence):
+            if len(value) != 6:
+                raise TranslateException(f"a major has 6 beads, not {len(value)}")
+            return value.real << 6 | value.imag
+
+        if isinstance(value, (list, tuple)) and len(value) == 2:
+            real, imag = value
+            if isinstance(real, int) and isinstance(imag, int):
+                if 0 <= real < 64 and 0 <= imag < 64:
+                    return real << 6 | imag
+
+        if not isinstance(value, str):
+            raise TranslateException(f"can't translate {value!r}")
+
+        return self._parse(value)
+
+    def _parse(self, value: str) -> int:
+        """the slow path for strings not in the tables,
+        spacing, padding and glyph variants or readings"""
+
+        text = value.strip()
+        if text in self._index:
+            return self._index[text]
+
+        try:
+            if text[:1] in ("y", "w") and ">" in text:
+                real, imag = (part.strip() for part in text[1:].split(">"))
+
+                if text[0] == "y":
+                    return self.major((int(real, 8), int(imag, 8)))
+
+                real, imag = int(real), int(imag)
+                if not (0 < real <= 64 and 0 < imag <= 64):
+                    raise ValueError("wen numbers run from 1 to 64")
+
+                values = Hexagram._VALUES["wen"]
+                return self.major((values[real - 1], values[imag - 1]))
+
+            if len(text.split()) > 1:
+                # a reading, whatever follows it is ignored
+                house = ChineseHouse([YSequence(room) for room in text[:51].split()])
+
+                # a one bead start and intent around three waves,
+                # anything else (a spaced out major) isn't a reading
+                lengths = [len(room) for room in house.rooms]
+                if len(lengths) != 5 or lengths[::4] != [1, 1] or min(lengths[1:4]) < 2:
+                    raise ValueError("not a major or a whole reading")
+
+                return self.major(house)
+
+            return self.major(YSequence(text))
+        except (YException, IndexError, ValueError) as e:
+            raise TranslateException(f"can't translate {value!r}: {e}") from e
+
+    def __call__(self, value: Any, to: str = None) -> Any:
+        """value in the notation to, or a dict of it
+        in every notation"""
+
+        major = self.major(value)
+
+        if to:
+            return self.table(to)[major]
+
+        return {notation: self._tables[notation][major] for notation in self.NOTATIONS}
+
+    def table(self, to: str) -> tuple:
+        """every major in the notation to"""
 
-class Translate(YSequence):
-    def __call__(self, value):
-        if value.startswith("y"):
-            return self.from_y(value)
+        if to not in self._tables:
+            raise TranslateException(f"unknown notation {to}")
 
-        # test if hexagram (x)
+        return self._tables[to]
 
-        elif value.startswith("w"):
-            return self.from_w(value)
+    def translate_many(
+        self, values: Iterable[Any], to: str, strict: bool = True
+    ) -> Iterator[Any]:
+        """translate a whole column, or the lines of a
+        file, to one notation in a single pass
 
-        # test if "vimcode" from core (v)
+        values can mix notations. unless strict, values
+        that can't be read come out as None
+        """
 
-        # test if unicode (u)
+        table = self.table(to)
+        index = self._index
 
-        # test if dot-notation (t)
+        for value in values:
+            try:
+                major = index.get(value)
+            except TypeError:
+                major = None
 
-    def from_y(self, value):
-        return value
+            if major is None:
+                try:
+                    major = self.major(value)
+                except TranslateException:
+                    if strict:
+                        raise
+                    yield None
+                    continue
 
-    def from_w(self, value):
-        return value
+            yield table[major]
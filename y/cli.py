@@ -0,0 +1,453 @@
+""" cli
+
+the commands of `python -m y`
+
+everything here is cheap to import, each command
+pulls in what it needs (cmd2, subprocess, the
+hexagram tables ...) only when it runs. the same
+commands back the interactive cmd2 shell in app.
+"""
+
+import os
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
+from typing import Callable, Dict, List, Tuple
+
+OBJECTS_DIR = os.getcwd() + "/o"
+
+
+def positive(value: str) -> int:
+    """an argparse type for counts of at least 1"""
+
+    try:
+        n = int(value)
+    except ValueError:
+        raise ArgumentTypeError(f"{value!r} is not a whole number") from None
+
+    if n < 1:
+        raise ArgumentTypeError(f"must be at least 1, not {n}")
+
+    return n
+
+
+def fmt_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "-j", "--jobs", type=positive, default=1, help="worker processes to use"
+    )
+    parser.add_argument(
+        "--chunk",
+        type=positive,
+        default=1024,
+        help="lines handed to a worker at once",
+    )
+
+
+def do_fmt(args) -> int:
+    from .fmt import fmt
+
+    return fmt(sys.stdin, jobs=args.jobs, size=args.chunk)
+
+
+def archive_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "direction",
+        choices=("import", "export"),
+        help="import dot-notation from stdin, or export it to stdout",
+    )
+    parser.add_argument("archive", help="the archive file")
+
+
+def do_archive(args) -> int:
+    from .archive import Archive, ArchiveException, from_text, to_text
+
+    # only an import makes a new archive
+    try:
+        archive = Archive(args.archive, create=args.direction == "import")
+    except ArchiveException as e:
+        print(f"archive: {e}", file=sys.stderr)
+        return 2
+
+    with archive:
+        if args.direction == "export":
+            to_text(archive, sys.stdout)
+            return 0
+
+        for line in from_text(sys.stdin, archive):
+            print(line, file=sys.stderr)
+
+    return 0
+
+
+def query_arguments(parser: ArgumentParser):
+    parser.add_argument("archive", help="the archive file")
+    for bead in ("intent", "start", "product1", "product2", "product3"):
+        parser.add_argument(f"--{bead}", help="a bead, e.g. 6, ⴲ or old-yin")
+    parser.add_argument("--real", type=int, help="major real value")
+    parser.add_argument("--imag", type=int, help="major imag value")
+    parser.add_argument(
+        "--wen", type=int, nargs=2, metavar=("REAL", "IMAG"), help="major wen numbers"
+    )
+    parser.add_argument("--count", action="store_true", help="only count matches")
+
+
+def do_query(args) -> int:
+    from . import YException
+    from .archive import Archive
+    from .query import Query, INDEXED
+
+    terms = {
+        term: getattr(args, term)
+        for term in INDEXED + ("wen",)
+        if getattr(args, term, None) is not None
+    }
+
+    try:
+        with Archive(args.archive) as archive:
+            matches = Query(archive).where(**terms)
+
+            if args.count:
+                print(len(matches))
+                return 0
+
+            for i in matches:
+                print(archive[i].composition)
+    except YException as e:
+        # no archive at the path, or a term that can't be read
+        print(f"query: {e}", file=sys.stderr)
+        return 2
+
+    return 0
+
+
+def translate_arguments(parser: ArgumentParser):
+    # Translate.NOTATIONS, spelled out to keep chinese out of startup
+    parser.add_argument(
+        "to",
+        choices=("dot", "y", "w", "x", "u", "pair"),
+        help="notation to translate into",
+    )
+    parser.add_argument(
+        "files", nargs="*", help="files of readings or majors, default stdin"
+    )
+
+
+def do_translate(args) -> int:
+    import fileinput
+    from .chinese import Translate
+    from .fmt import chunked
+
+    translate = Translate()
+    lines = (line.rstrip("\n") for line in fileinput.input(args.files))
+
+    for chunk in chunked(lines):
+        results = translate.translate_many(chunk, args.to, strict=False)
+        out = []
+
+        for line, result in zip(chunk, results):
+            if result is None:
+                print(line, file=sys.stderr)
+            else:
+                out.append(str(result))
+
+        if out:
+            sys.stdout.write("\n".join(out) + "\n")
+
+    return 0
+
+
+def serve_arguments(parser: ArgumentParser):
+    parser.add_argument("--socket", help="unix socket path to listen on")
+    parser.add_argument("--host", default="127.0.0.1", help="tcp host")
+    parser.add_argument("--port", type=int, default=7749, help="tcp port")
+
+
+def do_serve(args) -> int:
+    import asyncio
+    from .serve import serve
+
+    try:
+        asyncio.run(serve(args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+def bench_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "patterns", nargs="*", help="only run benchmarks with these in their names"
+    )
+    parser.add_argument("-o", "--output", help="write json results here")
+    parser.add_argument(
+        "--compare", metavar="BASELINE", help="json results to compare against"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="percent slower than the baseline that fails",
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="size of the macro benchmarks"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="best of this many")
+    parser.add_argument(
+        "--import-budget",
+        type=float,
+        default=0.075,
+        help="seconds the startup imports may take",
+    )
+
+
+def do_bench(args) -> int:
+    from .bench import bench
+
+    return bench(
+        args.patterns,
+        args.output,
+        args.compare,
+        args.threshold,
+        args.scale,
+        args.repeat,
+        args.import_budget,
+    )
+
+
+def no_arguments(parser: ArgumentParser):
+    pass
+
+
+def do_play(args) -> int:
+    from .chinese import ChineseHouse
+
+    rooms = ChineseHouse.play()
+    house = ChineseHouse(rooms)
+    print(house.composition)
+
+    return 0
+
+
+def commit_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "-n", type=int, default=1, help="compositions to play into one commit"
+    )
+
+
+def tree_dirty() -> bool:
+    """whether tracked files differ from HEAD
+
+    refresh the index stat info first so touched but
+    unchanged files don't count, then let diff-index
+    stop at the first difference
+    """
+
+    import subprocess
+
+    subprocess.run(("git", "update-index", "-q", "--refresh"), capture_output=True)
+    return (
+        subprocess.run(("git", "diff-index", "--quiet", "HEAD", "--")).returncode != 0
+    )
+
+
+def do_commit(args) -> int:
+    import subprocess
+    from .chinese import ChineseHouse
+
+    if not tree_dirty():
+        return 1
+
+    compositions = [
+        ChineseHouse(ChineseHouse.play_counts()).composition
+        for _ in range(max(args.n, 1))
+    ]
+
+    # one write and one fsync however many were played
+    with open("play.log", "a") as play_log:
+        play_log.write("\n".join(compositions) + "\n")
+        play_log.flush()
+        os.fsync(play_log.fileno())
+
+    # subprocess.run(("git", "add", "-f", "play.log", "index.*"))
+
+    # the first composition is the subject, any others the body
+    message = "\n\n".join((compositions[0], "\n".join(compositions[1:]))).strip()
+    return subprocess.run(
+        ("git", "commit", "-a", "-q", "-F", "-"), input=message, text=True
+    ).returncode
+
+
+def do_capture(args) -> int:
+    import subprocess
+    from datetime import datetime
+
+    subprocess.run(
+        ("imagesnap", "-d", "CA FLINT", f"{datetime.now():%Y%m%d%H%M%S}.png")
+    )
+
+
+def do_draw(args) -> int:
+    from .draw import yDrawApp
+
+    draw_app = yDrawApp()
+    sys.exit(draw_app.cmdloop())
+
+
+def download_arguments(parser: ArgumentParser):
+    parser.add_argument("urls", nargs="*", help="urls to download")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=4, help="downloads to run at once"
+    )
+    parser.add_argument(
+        "--per-host", type=int, default=2, help="downloads to run at once per host"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=3, help="times to retry a failed download"
+    )
+    parser.add_argument(
+        "--backoff", type=float, default=1.0, help="seconds before the first retry"
+    )
+    parser.add_argument(
+        "--manifest", help="json results file, default OBJECTS_DIR/downloads.json"
+    )
+    parser.add_argument(
+        "--downloader", help="yt-dlp compatible executable, default $Y_DOWNLOADER"
+    )
+
+
+def do_download(args) -> int:
+    from .download import DOWNLOADER, download
+
+    results = download(
+        args.urls,
+        OBJECTS_DIR,
+        manifest=args.manifest or OBJECTS_DIR + "/downloads.json",
+        downloader=args.downloader or DOWNLOADER,
+        workers=args.jobs,
+        per_host=args.per_host,
+        retries=args.retries,
+        backoff=args.backoff,
+    )
+
+    return int(any(result["status"] == "failed" for result in results))
+
+
+# name: (description, arguments, do_command)
+COMMANDS: Dict[str, Tuple[str, Callable, Callable]] = {
+    "fmt": ("reformat readings from stdin", fmt_arguments, do_fmt),
+    "play": ("play a house", no_arguments, do_play),
+    "commit": ("commit with a new composition", commit_arguments, do_commit),
+    "capture": ("take a snapshot", no_arguments, do_capture),
+    "draw": ("start the drawing shell", no_arguments, do_draw),
+    "download": ("download videos", download_arguments, do_download),
+    "archive": (
+        "convert play logs to and from archives",
+        archive_arguments,
+        do_archive,
+    ),
+    "query": ("find archived houses", query_arguments, do_query),
+    "translate": (
+        "translate majors between notations",
+        translate_arguments,
+        do_translate,
+    ),
+    "serve": ("serve json requests", serve_arguments, do_serve),
+    "bench": ("benchmark the hot paths", bench_arguments, do_bench),
+}
+
+
+def command_parser(name: str, parser_class=ArgumentParser) -> ArgumentParser:
+    """the argument parser of a single command"""
+
+    description, arguments, _ = COMMANDS[name]
+    parser = parser_class(prog=name, description=description)
+    arguments(parser)
+    return parser
+
+
+def profiled(command: Callable, args, path: str) -> int:
+    """run a command under cProfile, writing the raw
+    stats to path if it ends in .prof, a report by
+    cumulative time otherwise"""
+
+    import cProfile
+    import pstats
+
+    profile = cProfile.Profile()
+
+    try:
+        return profile.runcall(command, args)
+    finally:
+        if path.endswith(".prof"):
+            profile.dump_stats(path)
+        else:
+            with open(path, "w") as report:
+                stats = pstats.Stats(profile, stream=report)
+                stats.sort_stats("cumulative").print_stats(50)
+
+
+def main(argv: List[str]) -> int:
+    """run one command without the interactive shell"""
+
+    parser = ArgumentParser(prog="python -m y")
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="time the stages of the command, prometheus text to FILE or - for stderr",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        metavar="SECONDS",
+        help="log the stage timings this often while the command runs",
+    )
+    parser.add_argument(
+        "--profile", metavar="FILE", help="profile the command into FILE"
+    )
+    parser.add_argument(
+        "--log-stderr",
+        action="store_true",
+        help="log to stderr, keeping stdout for the command's output",
+    )
+    parser.add_argument(
+        "--log-file", metavar="FILE", help="also log json lines to a rotating FILE"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name, (description, arguments, _) in COMMANDS.items():
+        arguments(
+            commands.add_parser(name, help=description, description=description)
+        )
+
+    args = parser.parse_args(argv)
+    command = COMMANDS[args.command][2]
+
+    if args.log_stderr or args.log_file:
+        from .log import configure
+
+        configure("stderr" if args.log_stderr else None, args.log_file)
+
+    if args.metrics or args.metrics_interval:
+        # before the command imports what it instruments
+        from . import metrics
+
+        metrics.enable()
+
+        if args.metrics_interval:
+            from .log import log_metrics
+
+            log_metrics(args.metrics_interval)
+
+    try:
+        if args.profile:
+            return profiled(command, args, args.profile)
+
+        return command(args)
+    finally:
+        if args.metrics:
+            from .metrics import prometheus
+
+            if args.metrics == "-":
+                sys.stderr.write(prometheus())
+            else:
+                with open(args.metrics, "w") as f:
+                    f.write(prometheus())
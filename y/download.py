@@ -0,0 +1,203 @@
+""" download
+
+fetches videos into OBJECTS_DIR with yt-dlp
+
+urls are handed to a bounded pool of workers, with
+no more than a few at a time going to any one host
+so a long batch neither runs serially nor hammers a
+single site. videos already on disk are skipped,
+failures are retried with exponential backoff and
+every url ends up in a json manifest.
+
+the downloader is any executable taking yt-dlp's
+arguments, so a local fake can stand in for it.
+"""
+
+import glob
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from collections import Counter, deque
+from typing import Dict, Iterable, List
+from urllib.parse import parse_qs, urlsplit
+
+from .log import LOG
+from .metrics import count, timed
+
+DOWNLOADER = os.environ.get("Y_DOWNLOADER", "yt-dlp")
+WORKERS = 4
+PER_HOST = 2
+RETRIES = 3
+BACKOFF = 1.0  # seconds before the first retry, doubled after each
+
+
+def host(url: str) -> str:
+    """the host a url is fetched from, youtube's
+    short links count as youtube"""
+
+    name = (urlsplit(url).hostname or "").removeprefix("www.")
+    return "youtube.com" if name in ("youtu.be", "m.youtube.com") else name
+
+
+def video_id(url: str) -> str | None:
+    """the id yt-dlp will name the file by, when
+    it can be read off the url"""
+
+    parts = urlsplit(url)
+    name = host(url)
+
+    if name != "youtube.com":
+        return None
+
+    if parts.hostname == "youtu.be":
+        return parts.path.strip("/") or None
+
+    if parts.path.startswith(("/shorts/", "/live/")):
+        return parts.path.split("/")[2] or None
+
+    return parse_qs(parts.query).get("v", [None])[0]
+
+
+def target_dir(url: str, objects_dir: str) -> str:
+    if host(url) == "youtube.com":
+        return objects_dir + "/yt"
+
+    return objects_dir
+
+
+def downloaded(url: str, objects_dir: str) -> str | None:
+    """the file a url was already downloaded to"""
+
+    id = video_id(url)
+    if not id:
+        return None
+
+    for path in glob.glob(glob.escape(f"{target_dir(url, objects_dir)}/{id}") + ".*"):
+        if not path.endswith((".part", ".ytdl", ".info.json", ".vtt", ".srt")):
+            return path
+
+    return None
+
+
+@timed("download.fetch")
+def fetch(
+    url: str,
+    objects_dir: str,
+    downloader: str = DOWNLOADER,
+    retries: int = RETRIES,
+    backoff: float = BACKOFF,
+) -> dict:
+    """download one url, retrying failures, and
+    report how it went"""
+
+    target = target_dir(url, objects_dir) + "/%(id)s.%(ext)s"
+    result = {"url": url, "host": host(url), "target": target, "attempts": 0}
+    start = time.monotonic()
+
+    existing = downloaded(url, objects_dir)
+    if existing:
+        result.update(status="skipped", path=existing, seconds=0.0)
+        return result
+
+    command = (
+        downloader,
+        "-f",
+        "mp4",
+        "--write-info-json",
+        "--write-sub",
+        "--sub-lang",
+        "en",
+        "-o",
+        target,
+        url,
+    )
+
+    for attempt in range(retries + 1):
+        if attempt:
+            delay = backoff * 2 ** (attempt - 1)
+            LOG.info(f"retry {url} in {delay:g}s")
+            time.sleep(delay)
+
+        result["attempts"] = attempt + 1
+        LOG.info(f"download {url} to {target}")
+
+        try:
+            proc = subprocess.run(command, capture_output=True, text=True)
+        except OSError as e:
+            # a missing downloader won't turn up on a retry
+            result.update(status="failed", error=str(e))
+            break
+
+        result["returncode"] = proc.returncode
+
+        if proc.returncode == 0:
+            result["status"] = "downloaded"
+            result.pop("error", None)
+            break
+
+        error = proc.stderr.strip().splitlines()
+        result.update(status="failed", error=error[-1] if error else "")
+
+    result["seconds"] = round(time.monotonic() - start, 3)
+    return result
+
+
+def download(
+    urls: Iterable[str],
+    objects_dir: str,
+    manifest: str = None,
+    downloader: str = DOWNLOADER,
+    workers: int = WORKERS,
+    per_host: int = PER_HOST,
+    retries: int = RETRIES,
+    backoff: float = BACKOFF,
+) -> List[dict]:
+    """download urls concurrently and write the
+    results, in input order, to manifest"""
+
+    workers = max(workers, 1)
+    per_host = max(per_host, 1)
+    pending = deque(enumerate(dict.fromkeys(urls)))
+    results: Dict[int, dict] = {}
+    running = {}
+    hosts = Counter()
+
+    with ThreadPoolExecutor(workers) as pool:
+        while pending or running:
+            # start the first waiting urls whose hosts have room,
+            # skipping past busy hosts rather than waiting on them
+            for item in list(pending):
+                if len(running) >= workers:
+                    break
+
+                i, url = item
+                if hosts[host(url)] >= per_host:
+                    continue
+
+                pending.remove(item)
+                hosts[host(url)] += 1
+                future = pool.submit(
+                    fetch, url, objects_dir, downloader, retries, backoff
+                )
+                running[future] = i
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                result = future.result()
+                results[running.pop(future)] = result
+                hosts[result["host"]] -= 1
+                count(f"download.{result['status']}")
+                print(f"{result['status']} {result.get('path', result['url'])}")
+
+    results = [results[i] for i in sorted(results)]
+
+    if manifest:
+        os.makedirs(os.path.dirname(manifest) or ".", exist_ok=True)
+        with open(manifest, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    return results
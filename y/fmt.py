@@ -0,0 +1,129 @@
+""" fmt
+
+reformats play logs, one reading per line,
+into compositions
+
+lines are read lazily and handled in chunks so
+output starts right away and memory stays flat
+however long the log is. with more than one job
+the chunks fan out to a process pool but are
+still written back in input order.
+"""
+
+import sys
+from collections import deque
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Tuple
+
+from . import YException
+from .cache import ROOMS, parse_room
+from .chinese import ChineseHouse
+from . import metrics
+from .metrics import count, stage, timed
+
+CHUNK_SIZE = 1024  # lines per chunk
+
+
+def format_line(line: str) -> Tuple[bool, str]:
+    """compose a single log line
+
+    returns whether the line parsed, and either the
+    composition (keeping anything past the reading)
+    or the original line
+    """
+
+    reading = line[:51]
+    extra = line[51:]
+
+    try:
+        house = ChineseHouse([parse_room(r) for r in reading.split()])
+        return True, f"{house.composition} {extra.rstrip()}"
+    except (YException, IndexError):
+        return False, line.rstrip()
+
+
+@timed("fmt.chunk")
+def format_chunk(lines: List[str]) -> List[Tuple[bool, str]]:
+    results = [format_line(line) for line in lines]
+
+    # new rooms go to the disk cache once per chunk, pool
+    # workers never get to write them at exit
+    ROOMS.flush()
+    return results
+
+
+def _format_chunk_worker(lines: List[str]) -> tuple:
+    """format_chunk in a pool worker, along with the
+    metrics it recorded for the parent to merge"""
+
+    return format_chunk(lines), metrics.take()
+
+
+def chunked(lines: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[List[str]]:
+    if size < 1:
+        # an empty first chunk would end the input
+        raise ValueError(f"chunks hold at least 1 line, not {size}")
+
+    lines = iter(lines)
+    while chunk := list(islice(lines, size)):
+        yield chunk
+
+
+def format_chunks(
+    lines: Iterable[str], jobs: int = 1, size: int = CHUNK_SIZE
+) -> Iterator[List[Tuple[bool, str]]]:
+    """format lines chunk by chunk, in input order"""
+
+    if jobs <= 1:
+        yield from map(format_chunk, chunked(lines, size))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    def result(future) -> List[Tuple[bool, str]]:
+        results, recorded = future.result()
+        metrics.merge(recorded)
+        return results
+
+    # workers forked from here start without the parent's metrics
+    with ProcessPoolExecutor(jobs, initializer=metrics.reset) as pool:
+        # keep a bounded window of chunks in flight so a
+        # slow writer doesn't pull the whole input in
+        pending = deque()
+
+        for chunk in chunked(lines, size):
+            pending.append(pool.submit(_format_chunk_worker, chunk))
+
+            if len(pending) >= jobs * 2:
+                yield result(pending.popleft())
+
+        while pending:
+            yield result(pending.popleft())
+
+
+def fmt(
+    lines: Iterable[str],
+    out: IO = sys.stdout,
+    err: IO = sys.stderr,
+    jobs: int = 1,
+    size: int = CHUNK_SIZE,
+) -> int:
+    """write compositions to out and lines that
+    can't be read to err"""
+
+    for results in format_chunks(lines, jobs, size):
+        good = [text for ok, text in results if ok]
+        bad = [text for ok, text in results if not ok]
+        count("fmt.lines", len(results))
+        count("fmt.unread", len(bad))
+
+        with stage("fmt.write"):
+            if good:
+                out.write("\n".join(good) + "\n")
+                out.flush()
+
+            if bad:
+                err.write("\n".join(bad) + "\n")
+                err.flush()
+
+    return 0
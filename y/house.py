@@ -1,191 +1,117 @@
 """ house
 
 'houses' are the different structured games
-"""
 
-import random
-from functools import reduce
+every house is played the same way, an intent is
+drawn and three waves are split off a pile of 50
+beads, houses differ in what the pile holds. plays
+run on the packed counts engine of ChineseHouse.
 
-from . import ComplexGua, BaGua, Hexagram
+a score is the five rooms of a play, the start,
+the three waves and the intent
+"""
 
+import random
+from collections import Counter
+from typing import Any, List, Tuple
 
-class HouseException(Exception):
-    """base exception for houses"""
+from . import YHouse, YSequence
+from .chinese import PILE, HouseException, Translate, Trigram, _play_counts
+from .chinese import ChineseHouse as _ChineseHouse
 
 
-class House:
+class House(YHouse):
     """foundation house class"""
 
+    # beads of each code in a fresh pile
+    PILE: Tuple[int, ...] = PILE
 
-class PythagoreanHouse(House):
-    """pythagorean house
-    squares of 3 + 4 + 5"""
+    def __init__(self, score: List[YSequence], seed: int = None, kind: str = "mt"):
+        score = list(score)
 
-    pile = None
-    _score = None
+        if len(score) != 5:
+            raise HouseException(f"a score has 5 rooms, not {len(score)}")
 
-    def __init__(self, seed=None):
-        self._score = [None, [], [], [], None]
+        super().__init__(score)
 
-        if seed:
-            if len(seed) != 50:
-                raise HouseException("house must be seeded with 50 beads")
-            self.pile = seed
-        else:
-            self.pile = (
-                [ComplexGua(9)] * 9
-                + [ComplexGua(8)] * 22
-                + [ComplexGua(7)] * 16
-                + [ComplexGua(6)] * 3
-            )
+        # the seed that replays this house, when known, and
+        # the kind of generator it seeds
+        self.seed = seed
+        self.kind = kind
 
-    @property
-    def score(self):
-        return
+    @classmethod
+    def play(
+        cls, rng: random.Random = None, pile: List[Any] = None
+    ) -> List[YSequence]:
+        """play a score from a fresh pile, or from the
+        50 beads given"""
 
+        counts = cls.PILE
 
-class ChineseHouse(House):
-    """chinese house
-    this is the innovation of Knecht
-    based on the I Ching"""
+        if pile is not None:
+            codes = YSequence(pile).codes
+            if len(codes) != 50:
+                raise HouseException("house must be seeded with 50 beads")
 
-    pile = None
-    _score = None
+            tally = Counter(codes)
+            counts = tuple(tally[code] for code in range(4))
 
-    def __init__(self, seed=None):
-        self._score = [None, [], [], [], None]
+        return _ChineseHouse.unpack(_play_counts(rng or random, counts))
 
-        if seed:
-            if len(seed) != 50:
-                raise HouseException("house must be seeded with 50 beads")
-            self.pile = seed
-        else:
-            self.pile = (
-                [ComplexGua(9)] * 9
-                + [ComplexGua(8)] * 22
-                + [ComplexGua(7)] * 16
-                + [ComplexGua(6)] * 3
-            )
+    @classmethod
+    def from_seed(cls, seed: int = None, kind: str = "mt") -> "House":
+        """the house played from a seed, see
+        ChineseHouse.from_seed"""
 
-    @property
-    def score(self):
-        return len(self.pile) // 4, self._score
+        house = _ChineseHouse.from_seed(seed, kind, cls.play)
+        return cls(house.rooms, house.seed, house.kind)
 
     @property
-    def intent(self):
-        return self._score.score[4]
+    def score(self) -> List[YSequence]:
+        return self.rooms
 
     @property
-    def source(self):
-        return self._score[0]
-
-    def draw_intent(self):
-        self.pile = self.pile
-
-        random.shuffle(self.pile)
-        intent = self.pile.pop()
-        self._score[4] = intent
-
-    def split(self):
-        length = len(self.pile)
-        split = int(random.uniform(4, length - 4))
-
-        left = self.pile[:split]
-        right = self.pile[split:]
-
-        return left, right
-
-    def draw_wave(self):
-        score = []
+    def source(self) -> YSequence:
+        return self.rooms[0]
 
-        left, right = self.split()
-        random.shuffle(left)
-        random.shuffle(right)
-
-        # pop the wave starter
-        if not self._score[0]:
-            self._score[0] = right.pop()
-        else:
-            score += [right.pop()]
-
-        left_remainder = len(left) % 4 or 4
-        right_remainder = len(right) % 4 or 4
-
-        left, score_left = left[:-left_remainder], left[-left_remainder:]
-        right, score_right = right[:-right_remainder], right[-right_remainder:]
-
-        self.pile = left + right
-
-        score += score_left + score_right
-
-        self._pile = left + right
-        return score
-
-    def play(self):
-        self.draw_intent()
-
-        self._score[1] = self.draw_wave()
-        self._score[2] = self.draw_wave()
-        self._score[3] = self.draw_wave()
-
-        return self._score
+    @property
+    def intent(self) -> YSequence:
+        return self.rooms[4]
 
     @staticmethod
-    def score_trigram(score):
-        trigram = [
-            None,
-        ] * 3
+    def score_trigram(score: List[YSequence]) -> str:
+        """the wave products as real and imag trigrams"""
 
-        for i in range(1, 4):
-            line_score = reduce(lambda x, y: x * y, [ComplexGua(c) for c in score[i]])
-            trigram[i - 1] = line_score
-            # print(f"{i} {line_score.value} >>> {score[i]}")
-
-        return str(BaGua(*trigram))
+        lines = YSequence(_ChineseHouse(score).products[1:4])
+        return f"{Trigram._Y[lines.real]}>{Trigram._Y[lines.imag]}"
 
     @staticmethod
-    def score_dot(score):
-        dot_score = str(score[0])
+    def score_dot(score: List[YSequence]) -> str:
+        """the dot-notation composition, each wave set
+        off by its product"""
 
-        for i in range(1, 4):
-            line = reduce(lambda a, b: a * b, [ComplexGua(c) for c in score[i]])
+        return _ChineseHouse(score).composition
 
-            if line.score == 6:
-                dot_score = (
-                    dot_score + " " * 4 * i + "".join([str(c) for c in score[i]])
-                )
-            else:
-                dot_score = (
-                    dot_score
-                    + " " * (line.score - 6) * i
-                    + "".join([str(c) for c in score[i]])
-                )
+    @staticmethod
+    def score_hexagram(score: List[YSequence]) -> str:
+        """the major as hexagrams, y and wen numbers"""
 
-        dot_score += " " * (49 - len(dot_score)) + str(score[4])
+        house = _ChineseHouse(score)
+        translate = Translate()
+        return " == ".join(translate(house, notation) for notation in ("x", "y", "w"))
 
-        return dot_score
 
-    @staticmethod
-    def score_hexagram(score):
-        intent = score[0]
-        resolve = score[4]
-
-        def line_multiply(line):
-            amplitude = len(line) // 4
-            direction = reduce(lambda x, y: x * y, line)
-            return direction
+class PythagoreanHouse(House):
+    """pythagorean house
+    squares of 3 + 4 + 5, 9 old yang, 16 yang and
+    25 yin with no old yin"""
 
-        hex_repr = ""
-        gua = []
-        for room in score[1:4]:
-            line = line_multiply(room[0::4] + room[1::4])
-            hex_repr = hex_repr + str(line) + "> " + str(room[0::4] + room[1::4]) + "\n"
-            gua.append(line)
+    PILE = (16, 9, 25, 0)
 
-            line = line_multiply(room[2::4] + room[3::4])
-            hex_repr = hex_repr + str(line) + "> " + str(room[2::4] + room[3::4]) + "\n"
-            gua.append(line)
 
-        hexagram = Hexagram(*gua)
+class ChineseHouse(House):
+    """chinese house
+    this is the innovation of Knecht
+    based on the I Ching"""
 
-        return f"{hexagram} == y{hexagram.yi} == w{hexagram.wen}"
+    PILE = PILE
@@ -24,34 +24,283 @@ You can find the solution to a problem
 is to see the Way things were without it again
 """
 
+import atexit
+import json
 import logging
+import os
+import queue
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, RotatingFileHandler
+from typing import List
 
+BATCH = 512  # most records written between flushes
+MAX_BYTES = 10 * 2**20  # size of a log file before it rotates
+BACKUPS = 5  # rotated log files kept
 
-def _init_logger():
 
-    # Create a logger named 'y'
+class _Batched:
+    """a handler that only flushes when its batch is
+    written, not after every record"""
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchStreamHandler(_Batched, logging.StreamHandler):
+    pass
+
+
+class BatchFileHandler(_Batched, RotatingFileHandler):
+    pass
+
+
+class Formatter(logging.Formatter):
+    """the y log line, timestamps only have seconds so
+    each second is formatted once"""
+
+    def __init__(self):
+        super().__init__(
+            "%(asctime)s:%(levelname)s:%(name)s:%(module)s:%(message)s",
+            datefmt="%Y%m%d-%H%M%S%z",
+        )
+        self._second = None
+        self._asctime = None
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        if second != self._second:
+            self._asctime = time.strftime(self.datefmt, self.converter(second))
+            self._second = second
+        return self._asctime
+
+
+class JsonFormatter(logging.Formatter):
+    """one json object per record"""
+
+    def format(self, record):
+        message = record.getMessage()
+        if record.exc_text:
+            message += "\n" + record.exc_text
+
+        return json.dumps(
+            {
+                "time": record.created,
+                "level": record.levelname,
+                "name": record.name,
+                "module": record.module,
+                "message": message,
+            },
+            ensure_ascii=False,
+        )
+
+
+class _QueueHandler(QueueHandler):
+    """queues records without formatting them first
+
+    the message is merged with its args, which may
+    change once the call returns, and any traceback
+    is rendered, everything else waits for the writer
+    """
+
+    _exceptions = logging.Formatter()
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = self._exceptions.formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
+
+
+class Writer:
+    """writes queued records on a background thread
+
+    whatever has queued up while the last batch was
+    being written goes out as the next batch, with one
+    flush per handler, so a busy loop never waits on
+    the terminal or the disk
+    """
+
+    def __init__(self, handlers: List[logging.Handler]):
+        self.queue = queue.SimpleQueue()
+        self.handlers = handlers
+        self._thread = None
+
+        # what the logger gets, it only puts records on the queue
+        self.handler = _QueueHandler(self.queue)
+
+        # held while a batch is written, and across a fork so
+        # the child never inherits a half written stream
+        self.writing = threading.Lock()
+
+    def forked(self):
+        """start over in a forked child, which has the
+        lock and queue as they were but not the thread.
+        anything still queued is the parent's to write"""
+
+        self.writing = threading.Lock()
+        self.queue = self.handler.queue = queue.SimpleQueue()
+        self.start()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="y-log", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """write everything queued so far and stop"""
+
+        if self._thread and self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join()
+
+        self._thread = None
+
+        for handler in self.handlers:
+            handler.close()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+
+            while len(batch) < BATCH:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self.writing:
+                for record in batch:
+                    if record is None:
+                        self._flush()
+                        return
+
+                    for handler in self.handlers:
+                        if record.levelno >= handler.level:
+                            handler.handle(record)
+
+                self._flush()
+
+    def _flush(self):
+        for handler in self.handlers:
+            # a stream closed under us at exit, as logging.shutdown
+            try:
+                handler.flush_batch()
+            except (OSError, ValueError):
+                pass
+
+
+_WRITER = None
+
+
+def configure(stream: str = None, path: str = None, level: str = None):
+    """send the y log to stream (stdout, stderr or
+    none) and, as json lines, to a rotating file at
+    path. records are queued and written by a
+    background thread
+
+    anything not given comes from Y_LOG_STREAM,
+    Y_LOG_FILE and Y_LOG_LEVEL
+    """
+
+    global _WRITER
+
+    stream = stream or os.environ.get("Y_LOG_STREAM", "stdout")
+    path = path or os.environ.get("Y_LOG_FILE")
+    level = level or os.environ.get("Y_LOG_LEVEL", "INFO")
+
+    # Get the logger named 'y'
     logger = logging.getLogger("y")
 
-    # Set the threshold logging level of the logger to INFO
-    logger.setLevel(logging.INFO)
+    # Set the threshold logging level of the logger
+    logger.setLevel(level.upper())
+
+    # Drop the queue of an earlier configuration, writing
+    # out what it still holds
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
 
-    # Create a stream-based handler that writes the log entries
-    # into the standard output stream
-    handler = logging.StreamHandler(sys.stdout)
+    if _WRITER:
+        _WRITER.stop()
 
-    # Create a formatter for the logs
-    formatter = logging.Formatter(
-        "%(asctime)s:%(levelname)s:%(name)s:%(module)s:%(message)s",
-        datefmt="%Y%m%d-%H%M%S%z",
-    )
+    handlers = []
 
-    # Set the created formatter as the formatter of the handler
-    handler.setFormatter(formatter)
+    # A handler that writes the log lines into the standard
+    # output or error stream
+    if stream in ("stdout", "stderr"):
+        handler = BatchStreamHandler(getattr(sys, stream))
+        handler.setFormatter(Formatter())
+        handlers.append(handler)
 
-    # Add the created handler to this logger
-    logger.addHandler(handler)
+    # A handler that writes json lines into a file, starting
+    # a new one when it grows past MAX_BYTES
+    if path:
+        handler = BatchFileHandler(
+            path, maxBytes=MAX_BYTES, backupCount=BACKUPS, encoding="utf-8"
+        )
+        handler.setFormatter(JsonFormatter())
+        handlers.append(handler)
 
+    # The logger only puts records on a queue, the writer
+    # thread hands them to the handlers
+    _WRITER = Writer(handlers)
+    logger.addHandler(_WRITER.handler)
+    _WRITER.start()
 
-_init_logger()
+
+def _stop():
+    if _WRITER:
+        _WRITER.stop()
+
+
+def _before_fork():
+    if _WRITER:
+        _WRITER.writing.acquire()
+
+
+def _after_fork():
+    if _WRITER:
+        _WRITER.writing.release()
+
+
+def _after_fork_child():
+    if _WRITER:
+        _WRITER.forked()
+
+
+configure()
+atexit.register(_stop)
+os.register_at_fork(
+    before=_before_fork,
+    after_in_parent=_after_fork,
+    after_in_child=_after_fork_child,
+)
 LOG = logging.getLogger("y")
+
+
+def log_metrics(interval: float) -> threading.Event:
+    """log a json snapshot of the metrics every
+    interval seconds and once more at exit, set the
+    returned event to stop"""
+
+    from .metrics import snapshot
+
+    stop = threading.Event()
+
+    def log_snapshot():
+        LOG.info(f"metrics {json.dumps(snapshot(), sort_keys=True)}")
+
+    def run():
+        while not stop.wait(interval):
+            log_snapshot()
+
+    threading.Thread(target=run, name="y-metrics", daemon=True).start()
+    atexit.register(log_snapshot)
+    return stop
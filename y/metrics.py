@@ -0,0 +1,207 @@
+""" metrics
+
+timers and counters around the stages of a run,
+parsing, play, composition and i/o
+
+they're off unless Y_METRICS is set (or enable()
+is called before the instrumented modules are
+imported, as the --metrics flag does). a timed
+function is then left exactly as it was, so the
+hot paths pay nothing.
+
+snapshot() has everything so far, prometheus()
+the same as prometheus text. log.log_metrics
+writes snapshots as periodic log lines. worker
+processes hand back what they recorded with
+take(), for the parent to merge().
+"""
+
+import os
+import time
+from functools import wraps
+from typing import Callable, Dict, List
+
+ENABLED = bool(os.environ.get("Y_METRICS"))
+
+# name: [count, total seconds, max seconds]
+TIMERS: Dict[str, List] = {}
+COUNTERS: Dict[str, int] = {}
+
+_LOCK = None
+
+
+def enable():
+    """start collecting, only functions timed after
+    this are instrumented. processes started from
+    here on collect too"""
+
+    global ENABLED, _LOCK
+    import threading
+
+    if _LOCK is None:
+        _LOCK = threading.Lock()
+        os.register_at_fork(after_in_child=_after_fork)
+
+    os.environ["Y_METRICS"] = "1"
+    ENABLED = True
+
+
+def _after_fork():
+    # the lock may have been held by another thread
+    global _LOCK
+    import threading
+
+    _LOCK = threading.Lock()
+
+
+if ENABLED:
+    enable()
+
+
+def _record(name: str, seconds: float):
+    with _LOCK:
+        timer = TIMERS.get(name)
+        if timer is None:
+            TIMERS[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+
+def timed(name: str) -> Callable:
+    """decorator timing every call of a function as
+    the stage name"""
+
+    def decorator(func: Callable) -> Callable:
+        if not ENABLED:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class stage:
+    """time a block as the stage name
+
+        with stage("fmt.write"):
+            ...
+    """
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        if ENABLED:
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if ENABLED:
+            _record(self.name, time.perf_counter() - self.start)
+
+
+def count(name: str, n: int = 1):
+    """add n to the counter name"""
+
+    if ENABLED:
+        with _LOCK:
+            COUNTERS[name] = COUNTERS.get(name, 0) + n
+
+
+def snapshot() -> dict:
+    """every timer and counter so far"""
+
+    if not ENABLED:
+        return {"timers": {}, "counters": {}}
+
+    with _LOCK:
+        return {
+            "timers": {
+                name: {"count": n, "seconds": total, "max": most}
+                for name, (n, total, most) in sorted(TIMERS.items())
+            },
+            "counters": dict(sorted(COUNTERS.items())),
+        }
+
+
+def prometheus() -> str:
+    """a snapshot in the prometheus text format"""
+
+    metrics = snapshot()
+    lines = []
+
+    if metrics["timers"]:
+        lines.append("# HELP y_stage_seconds time spent in each stage")
+        lines.append("# TYPE y_stage_seconds summary")
+        for name, timer in metrics["timers"].items():
+            label = f'{{stage="{name}"}}'
+            lines.append(f"y_stage_seconds_count{label} {timer['count']}")
+            lines.append(f"y_stage_seconds_sum{label} {timer['seconds']:.9f}")
+
+        lines.append("# HELP y_stage_seconds_max slowest single call of each stage")
+        lines.append("# TYPE y_stage_seconds_max gauge")
+        for name, timer in metrics["timers"].items():
+            lines.append(f'y_stage_seconds_max{{stage="{name}"}} {timer["max"]:.9f}')
+
+    if metrics["counters"]:
+        lines.append("# HELP y_events_total events counted")
+        lines.append("# TYPE y_events_total counter")
+        for name, n in metrics["counters"].items():
+            lines.append(f'y_events_total{{event="{name}"}} {n}')
+
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def reset():
+    if ENABLED:
+        with _LOCK:
+            TIMERS.clear()
+            COUNTERS.clear()
+
+
+def take() -> dict:
+    """the raw timers and counters so far, clearing
+    them, to merge into another process"""
+
+    if not ENABLED:
+        return {"timers": {}, "counters": {}}
+
+    with _LOCK:
+        taken = {"timers": dict(TIMERS), "counters": dict(COUNTERS)}
+        TIMERS.clear()
+        COUNTERS.clear()
+
+    return taken
+
+
+def merge(taken: dict):
+    """add what take() returned in another process"""
+
+    if not ENABLED:
+        return
+
+    with _LOCK:
+        for name, (n, total, most) in taken["timers"].items():
+            timer = TIMERS.get(name)
+            if timer is None:
+                TIMERS[name] = [n, total, most]
+            else:
+                timer[0] += n
+                timer[1] += total
+                timer[2] = max(timer[2], most)
+
+        for name, n in taken["counters"].items():
+            COUNTERS[name] = COUNTERS.get(name, 0) + n
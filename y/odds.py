@@ -0,0 +1,172 @@
+""" odds
+
+exact outcome probabilities for ChineseHouse.play
+
+rather than playing many games, this walks the
+split and remainder process over pile compositions.
+beads of a state are interchangeable and every bead
+that leaves the pile in a wave is a uniform draw,
+so a wave only depends on the counts left in the
+pile (see chinese._play_counts).
+
+the result is the joint distribution of the six
+major lines, from which room products, line values
+and all 64x64 major (real, imag) transitions follow.
+it is memoized on disk after the first computation.
+"""
+
+import json
+from collections import defaultdict
+from fractions import Fraction
+from functools import lru_cache
+from operator import truediv
+from typing import Dict, List, Tuple
+
+from . import Y_CODE_STATES, Y_BitState, YSequence
+from .cache import CACHE_DIR
+from .chinese import PILE
+
+ODDS_VERSION = 1
+
+
+class Odds:
+    """outcome table of a ChineseHouse play
+
+    the table maps the codes of the six major lines,
+    in order, to their probability
+    """
+
+    def __init__(self, table: Dict[bytes, float | Fraction]):
+        self.table = table
+
+    @property
+    def major(self) -> Dict[Tuple[int, int], float | Fraction]:
+        """probability of each (real, imag) major"""
+
+        result = {}
+        for codes, p in self.table.items():
+            major = YSequence._from_codes(codes)
+            result[major.real, major.imag] = p
+        return result
+
+    @property
+    def lines(self) -> List[Dict[Y_BitState, float | Fraction]]:
+        """probability of each state for the six lines"""
+        return self._marginals(lambda codes: codes)
+
+    @property
+    def room_products(self) -> List[Dict[Y_BitState, float | Fraction]]:
+        """probability of each product for the three rooms"""
+        return self._marginals(
+            lambda codes: [(a + b) & 3 for a, b in zip(codes[0::2], codes[1::2])]
+        )
+
+    def _marginals(self, pick) -> List[Dict[Y_BitState, float | Fraction]]:
+        result = []
+
+        for codes, p in self.table.items():
+            for i, code in enumerate(pick(codes)):
+                if i == len(result):
+                    result.append(defaultdict(int))
+                result[i][Y_CODE_STATES[code]] += p
+
+        return [dict(marginal) for marginal in result]
+
+
+def _wave(counts: Tuple[int, ...], first: bool, ratio) -> dict:
+    """distribution of (line, line, counts) for one wave"""
+
+    total = sum(counts)
+
+    # the sizes of the drawn beads over every split point
+    sizes = defaultdict(int)
+    for split in range(4, total - 4):
+        sizes[1 + (split % 4 or 4) + ((total - split - 1) % 4 or 4)] += 1
+
+    result = defaultdict(int)
+
+    for size, splits in sizes.items():
+        # the first starter is the start of the house, not
+        # part of a line. the rest of the room alternates
+        # two beads to each line, see ChineseHouse.major
+        lines = [None] if first else []
+        lines += [0 if i % 4 < 2 else 1 for i in range(size - len(lines))]
+
+        states = {(counts, 0, 0): ratio(splits, total - 8)}
+
+        for line in lines:
+            drawn = defaultdict(int)
+
+            for (left, a, b), p in states.items():
+                remaining = sum(left)
+
+                for code, n in enumerate(left):
+                    if not n:
+                        continue
+
+                    after = left[:code] + (n - 1,) + left[code + 1 :]
+                    if line == 0:
+                        key = after, (a + code) & 3, b
+                    elif line == 1:
+                        key = after, a, (b + code) & 3
+                    else:
+                        key = after, a, b
+                    drawn[key] += p * ratio(n, remaining)
+
+            states = drawn
+
+        for (left, a, b), p in states.items():
+            result[a, b, left] += p
+
+    return result
+
+
+def compute(exact: bool = False) -> Odds:
+    """compute the outcome table, exactly with fractions
+    or (much faster) in floating point"""
+
+    ratio = Fraction if exact else truediv
+
+    @lru_cache(maxsize=None)
+    def play(wave: int, counts: Tuple[int, ...]) -> dict:
+        if wave == 3:
+            return {b"": 1}
+
+        result = defaultdict(int)
+        for (a, b, left), p in _wave(counts, wave == 0, ratio).items():
+            for rest, q in play(wave + 1, left).items():
+                result[bytes((a, b)) + rest] += p * q
+
+        return result
+
+    table = defaultdict(int)
+    total = sum(PILE)
+
+    # the intent comes out of the full pile first
+    for code, n in enumerate(PILE):
+        counts = PILE[:code] + (n - 1,) + PILE[code + 1 :]
+        for codes, p in play(0, counts).items():
+            table[codes] += ratio(n, total) * p
+
+    return Odds(dict(table))
+
+
+def odds(exact: bool = False, refresh: bool = False) -> Odds:
+    """the outcome table, read from the disk cache when
+    it's there and computed (and saved) otherwise"""
+
+    path = CACHE_DIR / f"odds-v{ODDS_VERSION}{'-exact' if exact else ''}.json"
+    number = Fraction if exact else float
+
+    if path.exists() and not refresh:
+        with open(path) as cache:
+            table = json.load(cache)
+        return Odds({bytes.fromhex(k): number(v) for k, v in table.items()})
+
+    result = compute(exact)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as cache:
+        json.dump({k.hex(): str(v) for k, v in result.table.items()}, cache)
+
+    return result
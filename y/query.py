@@ -0,0 +1,198 @@
+""" query
+
+indexed lookups over archived houses
+
+an archive gets a sidecar index file (the archive
+path plus ".idx") holding, for each indexed column,
+the record numbers of the archive sorted by value
+along with where each value starts. the index is
+mmapped, so looking up a value is a slice and a
+query is an intersection of slices.
+
+the index is rebuilt whenever the archive file
+has changed since it was written, grown, been
+rewritten or replaced.
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterator, List
+
+from . import YException, _code
+from .archive import Archive
+from .chinese import Hexagram
+
+MAGIC = b"YIDX"
+VERSION = 2
+
+# magic, version, records, columns, then the size, mtime
+# and inode of the archive file the index was built from
+HEADER = struct.Struct("<4sHxxQI4xQqQ")
+
+# archive columns that are indexed as they are
+BEAD_COLUMNS = ("intent", "start", "product1", "product2", "product3")
+MAJOR_COLUMNS = ("real", "imag")
+
+# columns derived from the major
+WEN_COLUMNS = {"wen_real": "real", "wen_imag": "imag"}
+
+INDEXED = BEAD_COLUMNS + MAJOR_COLUMNS + tuple(WEN_COLUMNS)
+
+# major value to wen number
+_WEN = bytes(Hexagram(value).wen for value in range(64)).ljust(256, b"\0")
+
+_VALUES = 256  # every byte value has a slot in the offsets
+
+
+class QueryException(YException):
+    """exception for queries"""
+
+
+def _postings(data: bytes) -> bytes:
+    """offsets then record numbers, grouped by value"""
+
+    groups = [array("I") for _ in range(_VALUES)]
+    for i, value in enumerate(data):
+        groups[value].append(i)
+
+    offsets = array("I", [0])
+    for group in groups:
+        offsets.append(offsets[-1] + len(group))
+
+    return offsets.tobytes() + b"".join(group.tobytes() for group in groups)
+
+
+def _contains(records: memoryview, i: int) -> bool:
+    at = bisect_left(records, i)
+    return at < len(records) and records[at] == i
+
+
+def build(archive: Archive, path: str | Path):
+    """write the index of an archive"""
+
+    columns = {}
+
+    for name in BEAD_COLUMNS + MAJOR_COLUMNS:
+        columns[name] = bytes(archive.column(name))
+
+    for name, major in WEN_COLUMNS.items():
+        columns[name] = columns[major].translate(_WEN)
+
+    partial = f"{path}.partial"
+    with open(partial, "wb") as index:
+        index.write(
+            HEADER.pack(
+                MAGIC, VERSION, len(archive), len(INDEXED), *archive.fingerprint()
+            )
+        )
+        for name in INDEXED:
+            index.write(_postings(columns[name]))
+
+    os.replace(partial, path)
+
+
+class Query:
+    """query the houses of an archive
+
+    terms are any of the INDEXED columns. beads and
+    products take anything a YBit does (a state, a
+    glyph, a lines number or a name), majors and wen
+    numbers take integers. major=(real, imag) and
+    wen=(real, imag) are shorthands for both parts.
+    """
+
+    def __init__(self, archive: Archive):
+        self.archive = archive
+        self.path = Path(f"{archive.path}.idx")
+
+        if not self._load():
+            build(archive, self.path)
+            self._load()
+
+    def _load(self) -> bool:
+        if not self.path.exists():
+            return False
+
+        with open(self.path, "rb") as index:
+            self._mmap = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            self._mmap.close()
+            return False
+
+        magic, version, records, columns, *fingerprint = HEADER.unpack_from(
+            self._mmap
+        )
+        if (magic, version, records, columns, *fingerprint) != (
+            MAGIC,
+            VERSION,
+            len(self.archive),
+            len(INDEXED),
+            *self.archive.fingerprint(),
+        ):
+            self._mmap.close()
+            return False
+
+        view = memoryview(self._mmap)[HEADER.size :].cast("I")
+        size = _VALUES + 1 + records
+
+        self._columns = {}
+        for i, name in enumerate(INDEXED):
+            column = view[i * size : (i + 1) * size]
+            self._columns[name] = column[: _VALUES + 1], column[_VALUES + 1 :]
+
+        return True
+
+    def lookup(self, column: str, value: int) -> memoryview:
+        """record numbers with a value in a column, ascending"""
+
+        if column not in self._columns:
+            raise QueryException(f"{column} is not indexed")
+
+        if not 0 <= value < _VALUES:
+            return memoryview(array("I"))
+
+        offsets, records = self._columns[column]
+        return records[offsets[value] : offsets[value + 1]]
+
+    def where(self, **terms) -> List[int]:
+        """record numbers matching every term, ascending"""
+
+        for both, (real, imag) in (
+            ("major", MAJOR_COLUMNS),
+            ("wen", tuple(WEN_COLUMNS)),
+        ):
+            if both in terms:
+                terms[real], terms[imag] = terms.pop(both)
+
+        matches = []
+
+        for column, value in terms.items():
+            if column in BEAD_COLUMNS:
+                code = _code(value)
+                if code is None:
+                    raise QueryException(f"{value} is not a bead")
+                value = code
+
+            matches.append(self.lookup(column, int(value)))
+
+        if not matches:
+            return list(range(len(self.archive)))
+
+        # walk the rarest value, binary searching the rest
+        matches.sort(key=len)
+        result = matches[0].tolist()
+        for match in matches[1:]:
+            result = [i for i in result if _contains(match, i)]
+
+        return result
+
+    def houses(self, **terms) -> Iterator:
+        """houses matching every term, in archive order"""
+
+        for i in self.where(**terms):
+            yield self.archive[i]
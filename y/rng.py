@@ -0,0 +1,57 @@
+""" rng
+
+random sources for plays
+
+anything with random(), uniform(), shuffle() and
+choice() like random.Random can drive a play. with
+numpy installed the counter based PCG64 and Philox
+generators are available too, they give the same
+stream for a seed on every platform.
+"""
+
+import random
+from typing import Any, MutableSequence, Sequence
+
+from . import YException
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+KINDS = ("mt", "pcg64", "philox")
+
+
+class NumpyRandom:
+    """the random.Random interface over a numpy Generator"""
+
+    def __init__(self, generator: "numpy.random.Generator"):
+        self._generator = generator
+
+    def random(self) -> float:
+        return float(self._generator.random())
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def shuffle(self, x: MutableSequence):
+        self._generator.shuffle(x)
+
+    def choice(self, seq: Sequence) -> Any:
+        return seq[int(self._generator.integers(len(seq)))]
+
+
+def generator(seed: int = None, kind: str = "mt") -> random.Random | NumpyRandom:
+    """a seeded random source, kind is one of KINDS"""
+
+    if kind == "mt":
+        return random.Random(seed)
+
+    if kind not in KINDS:
+        raise YException(f"unknown generator {kind}")
+
+    if numpy is None:
+        raise YException(f"the {kind} generator needs numpy")
+
+    bits = {"pcg64": numpy.random.PCG64, "philox": numpy.random.Philox}[kind]
+    return NumpyRandom(numpy.random.Generator(bits(seed)))
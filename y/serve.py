@@ -0,0 +1,163 @@
+""" serve
+
+a long running service for editors and scripts
+
+requests and responses are newline delimited json
+over a unix socket or localhost tcp. a connection
+can pipeline as many requests as it likes, the
+responses come back in the same order.
+
+    {"id": 1, "op": "play", "n": 2, "seed": 7}
+    {"id": 2, "op": "fmt", "lines": ["..."]}
+    {"id": 3, "op": "translate", "readings": ["..."]}
+    {"id": 4, "op": "translate", "readings": ["y12>34"], "to": "w"}
+
+every response carries the request id and either
+a "result" or an "error". ops run on a thread pool
+so a big batch from one client doesn't hold up the
+others.
+"""
+
+import asyncio
+import json
+import random
+from typing import Any, Callable, Dict
+
+from .chinese import ChineseHouse, Translate
+from .fmt import format_line
+from .log import LOG
+from .metrics import count, timed
+
+LIMIT = 2**24  # longest request line, batches can be big
+TRANSLATE = Translate()
+
+
+def play(request: dict) -> list:
+    """compositions of n new plays"""
+
+    rng = random.Random(request["seed"]) if "seed" in request else None
+    return [
+        ChineseHouse(ChineseHouse.play_counts(rng)).composition
+        for _ in range(int(request.get("n", 1)))
+    ]
+
+
+def fmt(request: dict) -> list:
+    """reformat lines as fmt does"""
+
+    return [
+        {"ok": ok, "text": text}
+        for ok, text in map(format_line, request["lines"])
+    ]
+
+
+def translate(request: dict) -> list:
+    """each reading, or major in any notation, in
+    every notation or just the one asked for"""
+
+    if "to" in request:
+        return list(TRANSLATE.translate_many(request["readings"], request["to"]))
+
+    result = []
+
+    for notations in map(TRANSLATE, request["readings"]):
+        real, imag = notations.pop("pair")
+        result.append({"real": real, "imag": imag, **notations})
+
+    return result
+
+
+OPS: Dict[str, Callable[[dict], Any]] = {
+    "play": play,
+    "fmt": fmt,
+    "translate": translate,
+}
+
+
+@timed("serve.respond")
+def respond(line: bytes) -> dict:
+    """handle one request line"""
+
+    try:
+        request = json.loads(line)
+    except ValueError as e:
+        return {"id": None, "error": f"bad request: {e}"}
+
+    if not isinstance(request, dict):
+        return {"id": None, "error": "bad request: not an object"}
+
+    response = {"id": request.get("id")}
+    name = request.get("op")
+    op = OPS.get(name) if isinstance(name, str) else None
+
+    if not op:
+        response["error"] = f"unknown op {name}"
+        return response
+
+    count(f"serve.{name}")
+
+    try:
+        response["result"] = op(request)
+    except Exception as e:
+        # whatever a request holds, it only fails itself
+        count("serve.errors")
+        response["error"] = f"{type(e).__name__}: {e}"
+
+    return response
+
+
+async def readline(reader: asyncio.StreamReader) -> bytes | None:
+    """the next request line, b"" at the end and None
+    for a line longer than LIMIT, which is skipped"""
+
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        return e.partial
+    except asyncio.LimitOverrunError:
+        pass
+
+    # drop the rest of the line, however long it is
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as e:
+            await reader.readexactly(e.consumed)
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    loop = asyncio.get_running_loop()
+
+    try:
+        while (line := await readline(reader)) != b"":
+            if line is None:
+                count("serve.errors")
+                response = {"id": None, "error": f"bad request: over {LIMIT} bytes"}
+            elif not line.strip():
+                continue
+            else:
+                response = await loop.run_in_executor(None, respond, line)
+
+            writer.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(path: str = None, host: str = "127.0.0.1", port: int = None):
+    """serve on a unix socket path, or on host and port"""
+
+    if path:
+        server = await asyncio.start_unix_server(handle, path, limit=LIMIT)
+    else:
+        server = await asyncio.start_server(handle, host, port, limit=LIMIT)
+
+    LOG.info(f"serving on {path or f'{host}:{port}'}")
+
+    async with server:
+        await server.serve_forever()
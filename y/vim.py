@@ -9,9 +9,6 @@ import vim
 
 sys.path.append(str(Path.cwd()))
 
-from y import YSequence
-from y.chinese import ChineseHouse, Hexagram
-
 NOW = datetime.now
 
 
@@ -33,32 +30,138 @@ def insert_uuid():
     vim.current.buffer[row - 1] = new_line
 
 
-def parse_yi(start, end, raw_args=""):
+# lines are handed to the editor this many at a time
+# when reformatting in the background
+CHUNK = 500
+
+# hashes of lines as a command last left them, keyed by
+# command, so running it again skips untouched lines
+_DONE = {}
+_DONE_MAX = 1 << 20
+
+# background jobs waiting for their next chunk
+_JOBS = []
+
+
+def _reformat(start, end, change, key=None, background=False):
+    """apply change to the lines from start to end (counting
+    from 1, inclusive) and write them back in one go
+
+    with a key, lines that are exactly as this command
+    left them last time are skipped. in the background
+    the range is done a chunk at a time off vim timers
+    so the editor keeps responding. the line numbers
+    only hold while the buffer is as the job left it,
+    so a job stops if the buffer is edited under it.
+    """
 
-    args = sh_split(raw_args)
     start = int(start) - 1
-    end = int(end) - 1
+    end = int(end)
+    number = vim.current.buffer.number
+
+    if background:
+        _JOBS.append((number, start, end, change, key, _tick(number)))
+        if len(_JOBS) == 1:
+            _schedule()
+        return
+
+    _run(number, start, end, change, key)
+
+
+def _buffer(number):
+    try:
+        return vim.buffers[number]
+    except KeyError:
+        return None
+
+
+def _tick(number):
+    """b:changedtick of a buffer, bumped by every change"""
+    return int(vim.eval(f"getbufvar({number}, 'changedtick')"))
+
+
+def _run(number, start, end, change, key):
+    buffer = _buffer(number)
+    if buffer is None:
+        return
+
+    lines = buffer[start:end]
+
+    done = _DONE.setdefault(key, set()) if key else set()
+    if len(done) > _DONE_MAX:
+        done.clear()
+
+    output = []
+    for line in lines:
+        if line and hash(line) not in done:
+            line = change(line)
+            if key:
+                done.add(hash(line))
+        output.append(line)
+
+    if output != lines:
+        buffer[start:end] = output
 
-    for n, line in [
-        (i, line) if start <= i <= end else (False, False)
-        for i, line in enumerate(vim.current.buffer)
-    ]:
-        if not n or not line:
-            continue
 
+def _schedule():
+    import __main__
+
+    # timers call back through vim's python globals
+    __main__._y_vim_background = _background
+    vim.command("call timer_start(0, {-> py3eval('_y_vim_background()')})")
+
+
+def _background():
+    number, start, end, change, key, tick = _JOBS[0]
+
+    if _buffer(number) is None:
+        _JOBS.pop(0)
+    elif _tick(number) != tick:
+        _JOBS.pop(0)
+        vim.command(
+            f"echomsg 'buffer {number} changed, stopped reformatting"
+            f" from line {start + 1}'"
+        )
+    else:
+        stop = min(start + CHUNK, end)
+        _run(number, start, stop, change, key)
+
+        # the job's own writes keep every line where it was, so
+        # jobs waiting on this buffer move on to the new tick
+        after = _tick(number)
+        for i, job in enumerate(_JOBS):
+            if job[0] == number and job[5] == tick:
+                _JOBS[i] = (*job[:5], after)
+
+        if stop < end:
+            _JOBS[0] = (number, stop, end, change, key, after)
+        else:
+            _JOBS.pop(0)
+
+    if _JOBS:
+        _schedule()
+
+
+def parse_yi(start, end, raw_args=""):
+    # the package is only loaded once it's needed
+    from y import YException
+    from y.cache import parse_room
+    from y.chinese import ChineseHouse
+
+    args = sh_split(raw_args)
+
+    def parse(line):
         try:
-            house = ChineseHouse([YSequence(x) for x in line[:50].split()])
+            house = ChineseHouse([parse_room(x) for x in line[:50].split()])
 
             output = f"{house.composition}"
 
+            x_real, x_imag = house.hexagrams
+
             if "-w" in args:
-                w_real = Hexagram(house.major.real).wen
-                w_imag = Hexagram(house.major.imag).wen
-                output += f" w{w_real}>{w_imag} "
+                output += f" w{x_real.wen}>{x_imag.wen} "
 
             if "-x" in args:
-                x_real = Hexagram(house.major.real)
-                x_imag = Hexagram(house.major.imag)
                 output += f" {x_real}>{x_imag} "
 
             if "-y" in args:
@@ -69,42 +172,28 @@ def parse_yi(start, end, raw_args=""):
             if not "-z" in args:
                 output += f"{line[50:].rstrip()}"
 
-            vim.current.buffer[n] = output
+            return output
 
-        except:
-            vim.current.buffer[n] = line.rstrip()
+        except (YException, IndexError):
+            return line.rstrip()
 
+    flags = tuple(sorted(arg for arg in args if arg != "-b"))
+    _reformat(start, end, parse, ("parse_yi", flags), "-b" in args)
 
-def case_random(start, end):
-    start = int(start) - 1
-    end = int(end) - 1
 
-    for n, line in [
-        (i, line) if start <= i <= end else (False, False)
-        for i, line in enumerate(vim.current.buffer)
-    ]:
-        if not n or not line:
-            continue
+def case_random(start, end, background=False):
+    def randomize(line):
+        return "".join([choice([a.lower(), a.upper()]) for a in line])
 
-        line = "".join([choice([a.lower(), a.upper()]) for a in line])
-        vim.current.buffer[n] = line
-
-
-def case_cloud(start, end):
-
-    start = int(start) - 1
-    end = int(end) - 1
+    # every run should shuffle again, so nothing is skipped
+    _reformat(start, end, randomize, background=background)
 
-    for n, line in [
-        (i, line) if start <= i <= end else (False, False)
-        for i, line in enumerate(vim.current.buffer)
-    ]:
 
-        if not n or not line:
-            continue
+def case_cloud(start, end, background=False):
+    def cloud(line):
+        return line[0:50].lower() + line[50:].upper()
 
-        line = line[0:50].lower() + line[50:].upper()
-        vim.current.buffer[n] = line
+    _reformat(start, end, cloud, "case_cloud", background)
 
 
 def grab(url, start, end):